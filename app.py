@@ -1,13 +1,22 @@
 import os
+import re
 import json
+import hashlib
+import hmac
 import sqlite3
-from flask import Flask, render_template, request, jsonify
+import threading
+from flask import Flask, Response, render_template, request, jsonify, send_from_directory
 from datetime import datetime, timedelta
 import requests
 from dotenv import load_dotenv
-import soccerdata as sd
-import pandas as pd
+import time
 import warnings
+import click
+from itertools import starmap
+from cache import create_cache
+from metrics import Metrics
+from records import MATCH_COLUMNS, MATCH_COLUMNS_SQL, MatchRecord, as_record
+from sources import CircuitBreaker, DataSource, DataSourceChain, RateLimiter, SourceError, SourcesUnavailable
 
 # Suppress warnings from soccerdata
 warnings.filterwarnings('ignore')
@@ -19,10 +28,63 @@ app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'dev-secret-key-change-i
 
 # Football Data API Configuration
 FOOTBALL_DATA_API_KEY = os.environ.get('FOOTBALL_DATA_API_KEY', '')
-FOOTBALL_DATA_BASE_URL = 'https://api.football-data.org/v4'
+FOOTBALL_DATA_BASE_URL = os.environ.get('FOOTBALL_DATA_BASE_URL', 'https://api.football-data.org/v4')
 FBREF_PROXY = os.environ.get('FBREF_PROXY')
 USE_SOCCERDATA = os.environ.get('USE_SOCCERDATA', 'false').lower() == 'true'
 SQLITE_DB_PATH = os.environ.get('SQLITE_DB_PATH', 'gambit.db')
+ENABLE_METRICS = os.environ.get('ENABLE_METRICS', 'false').lower() == 'true'
+# Directory where each worker publishes its metrics so /metrics covers all of them (empty: per process)
+METRICS_DIR = os.environ.get('METRICS_DIR', '')
+# 'inline': the first worker to claim a window syncs it; 'sidecar': web workers never sync
+SYNC_MODE = os.environ.get('SYNC_MODE', 'inline').lower()
+# Seconds after which an unfinished sync claim is considered abandoned
+SYNC_LEASE_SECONDS = int(os.environ.get('SYNC_LEASE_SECONDS', '120'))
+# Seconds claim_sync waits for the write lock before leaving the sync to its holder
+SYNC_CLAIM_TIMEOUT = float(os.environ.get('SYNC_CLAIM_TIMEOUT', '0.5'))
+# 'memory' (per process) or 'sqlite' (shared by every worker through SQLITE_DB_PATH)
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'memory').lower()
+# Upstream deadlines in seconds (per provider and for the whole fallback chain)
+FOOTBALL_DATA_DEADLINE = float(os.environ.get('FOOTBALL_DATA_DEADLINE', '6'))
+SOCCERDATA_DEADLINE = float(os.environ.get('SOCCERDATA_DEADLINE', '10'))
+SOURCES_TOTAL_DEADLINE = float(os.environ.get('SOURCES_TOTAL_DEADLINE', '12'))
+# Hedge delay used until enough upstream latencies are recorded for a p95
+HEDGE_DEFAULT_DELAY = float(os.environ.get('HEDGE_DEFAULT_DELAY', '1.0'))
+# soccerdata calls that may still be running (stuck ones past their deadline included)
+SOCCERDATA_MAX_IN_FLIGHT = int(os.environ.get('SOCCERDATA_MAX_IN_FLIGHT', '2'))
+# Seconds before a window answered by a fallback provider asks Football Data again
+SYNC_FALLBACK_RETRY_SECONDS = int(os.environ.get('SYNC_FALLBACK_RETRY_SECONDS', '900'))
+# Maximum fixtures returned by /api/search
+SEARCH_RESULT_LIMIT = 50
+# Derive team form from the local SQLite history for scheduled matches
+USE_LOCAL_HISTORY = os.environ.get('USE_LOCAL_HISTORY', 'false').lower() == 'true'
+# Finished matches considered for team form and head-to-head records
+TEAM_HISTORY_LIMIT = 10
+# Maximum match ids accepted by POST /api/predictions/batch
+PREDICTION_BATCH_LIMIT = 100
+# Football Data lookups of match ids missing from SQLite: calls per minute per
+# worker, and seconds an id Football Data did not know is not asked for again
+ID_LOOKUP_RATE_LIMIT = int(os.environ.get('ID_LOOKUP_RATE_LIMIT', '5'))
+MISSING_MATCH_TTL = int(os.environ.get('MISSING_MATCH_TTL', '3600'))
+# Partitioned Parquet/Arrow exports of matches and predictions
+EXPORT_DIR = os.environ.get('EXPORT_DIR', 'exports')
+# Bearer token required by POST /api/export (unset: exports only run from the CLI)
+EXPORT_TOKEN = os.environ.get('EXPORT_TOKEN', '')
+# Seconds after which a running export's lease is considered abandoned
+EXPORT_LEASE_SECONDS = int(os.environ.get('EXPORT_LEASE_SECONDS', '3600'))
+# sync_state row holding the export lease and the last export status
+EXPORT_STATE_KEY = 'export'
+# Monte Carlo season simulations: default/maximum runs and worker processes
+SIMULATION_RUNS = int(os.environ.get('SIMULATION_RUNS', '100000'))
+SIMULATION_WORKERS = int(os.environ.get('SIMULATION_WORKERS', str(os.cpu_count() or 1)))
+# Seed used by /api/simulation (custom seeds are only accepted by `flask simulate`)
+SIMULATION_SEED = int(os.environ.get('SIMULATION_SEED', '0'))
+# Run counts /api/simulation accepts; other values are rounded down to one of them
+SIMULATION_RUN_OPTIONS = tuple(sorted({runs for runs in (1000, 10000) if runs < SIMULATION_RUNS} | {SIMULATION_RUNS}))
+# Simulation results kept in simulation_cache
+SIMULATION_CACHE_ENTRIES = int(os.environ.get('SIMULATION_CACHE_ENTRIES', '64'))
+
+# Request timing spans and counters (no-ops unless ENABLE_METRICS=true)
+metrics = Metrics(enabled=ENABLE_METRICS, shared_dir=METRICS_DIR or None)
 
 # League codes mapping
 LEAGUES = {
@@ -48,6 +110,22 @@ LEAGUE_NAMES = {
     'CLI': 'CONMEBOL Copa Libertadores'
 }
 
+# Table zones for league competitions: qualifying places and relegated places
+TABLE_ZONES = {
+    'PL': {'qualification': 4, 'relegation': 3},
+    'PD': {'qualification': 4, 'relegation': 3},
+    'BL1': {'qualification': 4, 'relegation': 2},
+    'SA': {'qualification': 4, 'relegation': 3},
+}
+
+# Fixture statuses that no longer count as remaining; every other status
+# (SCHEDULED, TIMED, IN_PLAY, PAUSED, SUSPENDED, POSTPONED...) is still to be
+# decided. Standings only include FINISHED, so live games are not counted twice.
+DECIDED_STATUSES = ('FINISHED', 'AWARDED', 'CANCELLED')
+
+# Fixtures under way: their score so far is kept and only the rest is simulated.
+LIVE_STATUSES = ('IN_PLAY', 'PAUSED', 'SUSPENDED')
+
 # Soccerdata league mapping
 SOCCERDATA_LEAGUES = {
     # FBref in soccerdata does not provide UEFA Champions League directly.
@@ -61,20 +139,66 @@ SOCCERDATA_LEAGUES = {
     'CLI': None
 }
 
-# Cache for historical data
-historical_stats_cache = {}
+# Database paths whose schema has already been created by this process
+_initialized_db_paths = set()
 
 
-def get_db_connection():
-    """Create a SQLite connection for local cache operations."""
-    conn = sqlite3.connect(SQLITE_DB_PATH)
+class ClosingConnection(sqlite3.Connection):
+    """
+    SQLite connection closed at the end of its ``with`` block.
+
+    A plain connection only commits there and is left to the garbage
+    collector (its statement cache keeps it in a reference cycle). A worker
+    forked while such a connection is still open shares SQLite's
+    per-process lock bookkeeping with its parent and can corrupt the file.
+    """
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            return super().__exit__(exc_type, exc, tb)
+        finally:
+            self.close()
+
+
+def _connect():
+    """Open a raw SQLite connection to SQLITE_DB_PATH."""
+    conn = sqlite3.connect(SQLITE_DB_PATH, factory=ClosingConnection)
     conn.row_factory = sqlite3.Row
     return conn
 
 
-def init_db():
-    """Initialize local SQLite tables for API cache and sync state."""
-    with get_db_connection() as conn:
+def get_db_connection():
+    """Create a SQLite connection for local cache operations."""
+    if SQLITE_DB_PATH not in _initialized_db_paths:
+        init_db()
+    return _connect()
+
+
+# Cache for historical data (shared across workers with CACHE_BACKEND=sqlite)
+historical_stats_cache = create_cache(CACHE_BACKEND, 'team_stats', get_db_connection, default_ttl=24 * 3600)
+# Simulation results, keyed by a fingerprint of the table and remaining fixtures
+simulation_cache = create_cache(CACHE_BACKEND, 'simulation', get_db_connection, default_ttl=24 * 3600,
+                                max_entries=SIMULATION_CACHE_ENTRIES)
+# Match ids Football Data answered without (negative cache for resolve_matches)
+missing_match_ids_cache = create_cache(CACHE_BACKEND, 'missing_match_ids', get_db_connection,
+                                       default_ttl=MISSING_MATCH_TTL, max_entries=10000)
+# Matches served by a fallback provider: never written to the matches table
+fallback_matches_cache = create_cache(CACHE_BACKEND, 'fallback_matches', get_db_connection,
+                                      default_ttl=SYNC_FALLBACK_RETRY_SECONDS)
+
+
+def init_db(force=False):
+    """
+    Initialize local SQLite tables for API cache and sync state.
+
+    Idempotent: the schema is created once per database path and process,
+    so entry points can call it explicitly and connections fall back to it.
+    """
+    if SQLITE_DB_PATH in _initialized_db_paths and not force:
+        return
+    with _connect() as conn:
+        # WAL lets worker processes read while another one writes a sync.
+        conn.execute("PRAGMA journal_mode=WAL")
         conn.execute(
             """
             CREATE TABLE IF NOT EXISTS matches (
@@ -90,10 +214,22 @@ def init_db():
                 score_home INTEGER,
                 score_away INTEGER,
                 raw_json TEXT NOT NULL,
-                updated_at TEXT NOT NULL
+                updated_at TEXT NOT NULL,
+                change_seq INTEGER
             )
             """
         )
+        if 'change_seq' not in {column[1] for column in conn.execute("PRAGMA table_info(matches)")}:
+            # Caches created before change_seq: number existing rows in updated_at order.
+            conn.execute("ALTER TABLE matches ADD COLUMN change_seq INTEGER")
+            conn.execute(
+                """
+                UPDATE matches SET change_seq = ordered.seq
+                FROM (SELECT match_id, ROW_NUMBER() OVER (ORDER BY updated_at, match_id) AS seq
+                      FROM matches) AS ordered
+                WHERE matches.match_id = ordered.match_id
+                """
+            )
         conn.execute(
             """
             CREATE TABLE IF NOT EXISTS sync_state (
@@ -111,10 +247,164 @@ def init_db():
             ON matches (league_code, utc_date)
             """
         )
+        conn.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_matches_home_team_date
+            ON matches (home_team_id, utc_date)
+            """
+        )
+        conn.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_matches_away_team_date
+            ON matches (away_team_id, utc_date)
+            """
+        )
+        conn.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_matches_change_seq
+            ON matches (change_seq)
+            """
+        )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS cache_entries (
+                namespace TEXT NOT NULL,
+                cache_key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                expires_at REAL,
+                PRIMARY KEY (namespace, cache_key)
+            )
+            """
+        )
+        # Full-text index over team and competition names (rowid = match_id).
+        conn.execute(
+            """
+            CREATE VIRTUAL TABLE IF NOT EXISTS matches_fts USING fts5(
+                home_team, away_team, competition_name,
+                tokenize = 'unicode61 remove_diacritics 2'
+            )
+            """
+        )
+        # Standings per competition and season, maintained incrementally by
+        # upsert_matches; standings_applied remembers what each finished match
+        # contributed so corrections can be reversed.
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS standings (
+                league_code TEXT NOT NULL,
+                season TEXT NOT NULL,
+                team_id INTEGER NOT NULL,
+                team_name TEXT,
+                played INTEGER NOT NULL DEFAULT 0,
+                won INTEGER NOT NULL DEFAULT 0,
+                drawn INTEGER NOT NULL DEFAULT 0,
+                lost INTEGER NOT NULL DEFAULT 0,
+                goals_for INTEGER NOT NULL DEFAULT 0,
+                goals_against INTEGER NOT NULL DEFAULT 0,
+                points INTEGER NOT NULL DEFAULT 0,
+                form TEXT NOT NULL DEFAULT '',
+                updated_at TEXT,
+                PRIMARY KEY (league_code, season, team_id)
+            )
+            """
+        )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS standings_applied (
+                match_id INTEGER PRIMARY KEY,
+                league_code TEXT NOT NULL,
+                season TEXT NOT NULL,
+                utc_date TEXT,
+                home_team_id INTEGER NOT NULL,
+                away_team_id INTEGER NOT NULL,
+                score_home INTEGER NOT NULL,
+                score_away INTEGER NOT NULL
+            )
+            """
+        )
+        conn.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_standings_applied_season
+            ON standings_applied (league_code, season, utc_date)
+            """
+        )
+        # Cup tables built by earlier versions.
+        conn.execute(
+            f"DELETE FROM standings WHERE league_code NOT IN ({', '.join('?' for _ in TABLE_ZONES)})",
+            tuple(TABLE_ZONES),
+        )
+        if conn.execute("SELECT 1 FROM matches_fts LIMIT 1").fetchone() is None:
+            # Backfill caches created before the index existed.
+            conn.execute(
+                """
+                INSERT INTO matches_fts (rowid, home_team, away_team, competition_name)
+                SELECT match_id, home_team, away_team, competition_name FROM matches
+                """
+            )
+    _initialized_db_paths.add(SQLITE_DB_PATH)
+
+    with _connect() as conn:
+        needs_backfill = (
+            conn.execute("SELECT 1 FROM standings_applied LIMIT 1").fetchone() is None
+            and conn.execute("SELECT 1 FROM matches WHERE status = 'FINISHED' LIMIT 1").fetchone() is not None
+        )
+    if needs_backfill:
+        rebuild_standings()
+
+
+@app.cli.command('init-db')
+def init_db_command():
+    """Create the SQLite cache schema (flask --app app init-db)."""
+    init_db(force=True)
+    print(f"Initialized SQLite cache at {SQLITE_DB_PATH}")
 
 
-# Ensure DB exists when app is imported by Flask or tests.
-init_db()
+@app.cli.command('sync')
+@click.option('--loop', is_flag=True, help='Keep running and re-sync every --interval seconds.')
+@click.option('--interval', default=900, show_default=True, help='Seconds between sync passes.')
+def sync_command(loop, interval):
+    """Sync the default request windows (sidecar for SYNC_MODE=sidecar)."""
+    init_db()
+    while True:
+        synced = sum(1 for window in default_sync_windows() if sync_window(*window))
+        print(f"Synced {synced} window(s) at {datetime.utcnow().isoformat()}Z")
+        if not loop:
+            return
+        time.sleep(interval)
+
+
+@app.cli.command('export')
+@click.option('--output', default=None, help='Export directory (defaults to EXPORT_DIR).')
+@click.option('--format', 'file_format', type=click.Choice(['parquet', 'arrow']), default='parquet',
+              show_default=True, help="'arrow' writes uncompressed IPC files that can be memory-mapped.")
+@click.option('--full', is_flag=True, help='Drop previous exports and export every match again.')
+def export_command(output, file_format, full):
+    """Export matches changed since the last export with their predictions."""
+    init_db()
+    try:
+        summary = export_matches(output, file_format=file_format, full=full)
+    except ExportInProgress:
+        raise click.ClickException("Another export is running; try again when it finishes")
+    print(f"Exported {summary['rows']} match(es) to {len(summary['files'])} file(s) in {output or EXPORT_DIR}")
+
+
+@app.cli.command('simulate')
+@click.argument('league_code')
+@click.option('--simulations', default=SIMULATION_RUNS, show_default=True, help='Simulated seasons.')
+@click.option('--seed', default=SIMULATION_SEED, show_default=True, help='Random seed.')
+def simulate_command(league_code, simulations, seed):
+    """Print Monte Carlo table odds for a league with any run count and seed."""
+    if league_code not in TABLE_ZONES:
+        raise click.BadParameter(f"choose one of {', '.join(TABLE_ZONES)}", param_hint='LEAGUE_CODE')
+    init_db()
+    result = simulate_league(league_code, simulations=simulations, seed=seed)
+    if result is None:
+        print(f"No standings or fixtures for {league_code} in the local cache")
+        return
+    print(f"{'team':<30}{'title':>8}{'top':>8}{'releg.':>8}{'points':>8}")
+    for team in result['teams']:
+        print(f"{team['team_name']:<30}{team['title']:>8.3f}{team['qualification']:>8.3f}"
+              f"{team['relegation']:>8.3f}{team['expected_points']:>8.1f}")
 
 
 def build_cache_key(league_code, date_from, date_to):
@@ -141,29 +431,97 @@ def mark_sync_state(cache_key, status, error_message=None):
         )
 
 
+def fallback_retry_pending(row, now):
+    """Check whether a window served by a fallback provider is still waiting to retry."""
+    retry_cutoff = (now - timedelta(seconds=SYNC_FALLBACK_RETRY_SECONDS)).isoformat() + 'Z'
+    return row['last_status'] == 'fallback' and row['updated_at'] > retry_cutoff
+
+
 def should_sync_today(cache_key):
-    """Allow a single sync attempt per day for each request window."""
-    today = datetime.utcnow().strftime('%Y-%m-%d')
+    """Allow a single successful sync per day for each request window."""
+    now = datetime.utcnow()
+    today = now.strftime('%Y-%m-%d')
     with get_db_connection() as conn:
         row = conn.execute(
-            "SELECT last_synced_on, last_status FROM sync_state WHERE cache_key = ?",
+            "SELECT last_synced_on, last_status, updated_at FROM sync_state WHERE cache_key = ?",
             (cache_key,),
         ).fetchone()
     if row is None:
         return True
     if row['last_synced_on'] != today:
         return True
-    return row['last_status'] != 'success'
+    return row['last_status'] != 'success' and not fallback_retry_pending(row, now)
+
+
+def claim_sync(cache_key, lease_seconds=None, daily=True):
+    """
+    Atomically take ownership of today's sync for a request window.
+
+    Exactly one caller across all worker processes gets True; the others keep
+    serving from SQLite until the owner marks the window as synced. Claims
+    older than SYNC_LEASE_SECONDS (or ``lease_seconds``) are treated as
+    abandoned (crashed worker). When another connection holds the write lock
+    (a long upsert), the caller is not the owner either and serves from SQLite.
+    With ``daily=False`` the claim is a plain lease (exports): a finished run
+    does not block the next one.
+    """
+    now = datetime.utcnow()
+    today = now.strftime('%Y-%m-%d')
+    lease = SYNC_LEASE_SECONDS if lease_seconds is None else lease_seconds
+    lease_cutoff = (now - timedelta(seconds=lease)).isoformat() + 'Z'
+    with get_db_connection() as conn:
+        conn.execute(f"PRAGMA busy_timeout = {int(SYNC_CLAIM_TIMEOUT * 1000)}")
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+        except sqlite3.OperationalError as e:
+            if 'locked' not in str(e) and 'busy' not in str(e):
+                raise
+            return False
+        row = conn.execute(
+            "SELECT last_synced_on, last_status, updated_at FROM sync_state WHERE cache_key = ?",
+            (cache_key,),
+        ).fetchone()
+        if row is not None and (row['last_synced_on'] == today or not daily):
+            if daily and (row['last_status'] == 'success' or fallback_retry_pending(row, now)):
+                return False
+            if row['last_status'] == 'in_progress' and row['updated_at'] > lease_cutoff:
+                return False
+        conn.execute(
+            """
+            INSERT INTO sync_state (cache_key, last_synced_on, last_status, last_error, updated_at)
+            VALUES (?, ?, 'in_progress', ?, ?)
+            ON CONFLICT(cache_key) DO UPDATE SET
+                last_synced_on=excluded.last_synced_on,
+                last_status=excluded.last_status,
+                last_error=excluded.last_error,
+                updated_at=excluded.updated_at
+            """,
+            (cache_key, today, f"pid {os.getpid()}", now.isoformat() + 'Z'),
+        )
+    return True
 
 
 def upsert_matches(matches):
-    """Store API matches in SQLite for fast local reads."""
+    """
+    Store API matches in SQLite for fast local reads.
+
+    Every written row gets the next ``change_seq``. The value is computed by
+    the INSERT itself, inside the write transaction SQLite serializes, so
+    sequence numbers follow commit order. updated_at does not: it is stamped
+    before the transaction starts.
+
+    A match repeated in one batch is written once, with its last payload:
+    the FTS sync and the standings deltas assume one row per match_id.
+    """
+    matches = list({match.get('id'): match for match in matches}.values())
     if not matches:
         return
     now_iso = datetime.utcnow().isoformat() + 'Z'
     rows = []
+    seasons = []
     for match in matches:
         full_time = match.get('score', {}).get('fullTime', {})
+        seasons.append(season_of(match))
         rows.append(
             (
                 match.get('id'),
@@ -182,14 +540,16 @@ def upsert_matches(matches):
             )
         )
 
+    metrics.incr('rows_upserted', len(rows))
     with get_db_connection() as conn:
         conn.executemany(
             """
             INSERT INTO matches (
                 match_id, league_code, competition_name, utc_date, status,
                 home_team, home_team_id, away_team, away_team_id,
-                score_home, score_away, raw_json, updated_at
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                score_home, score_away, raw_json, updated_at, change_seq
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?,
+                      (SELECT COALESCE(MAX(change_seq), 0) + 1 FROM matches))
             ON CONFLICT(match_id) DO UPDATE SET
                 league_code=excluded.league_code,
                 competition_name=excluded.competition_name,
@@ -202,14 +562,427 @@ def upsert_matches(matches):
                 score_home=excluded.score_home,
                 score_away=excluded.score_away,
                 raw_json=excluded.raw_json,
-                updated_at=excluded.updated_at
+                updated_at=excluded.updated_at,
+                change_seq=excluded.change_seq
             """,
             rows,
         )
+        # Keep the full-text index in step with the rows just written.
+        conn.executemany("DELETE FROM matches_fts WHERE rowid = ?", [(row[0],) for row in rows])
+        conn.executemany(
+            "INSERT INTO matches_fts (rowid, home_team, away_team, competition_name) VALUES (?, ?, ?, ?)",
+            [(row[0], row[5], row[7], row[2]) for row in rows],
+        )
+        apply_standings_changes(conn, rows, seasons)
 
 
-def fetch_matches_from_api(league_code=None, date_from=None, date_to=None):
-    """Fetch matches from Football Data API only."""
+def season_of(match):
+    """Season label (start year) of a Football Data match, e.g. '2025' for 2025/26."""
+    start_date = (match.get('season') or {}).get('startDate')
+    if start_date:
+        return start_date[:4]
+    utc_date = match.get('utcDate') or ''
+    if len(utc_date) < 7:
+        return None
+    year, month = int(utc_date[:4]), int(utc_date[5:7])
+    return str(year if month >= 7 else year - 1)
+
+
+def _standing_delta(score_for, score_against, sign):
+    """Per-team standings delta for one result (sign=-1 reverses it)."""
+    won, drawn, lost = score_for > score_against, score_for == score_against, score_for < score_against
+    return (
+        sign,
+        sign * won,
+        sign * drawn,
+        sign * lost,
+        sign * score_for,
+        sign * score_against,
+        sign * (3 * won + drawn),
+    )
+
+
+def apply_standings_changes(conn, rows, seasons):
+    """
+    Incrementally update standings for matches whose FINISHED result changed.
+
+    Only rows that became FINISHED, changed score or left FINISHED touch the
+    standings, so the cost follows the number of changed matches. Every
+    finished result is recorded in standings_applied (the backtest reads it),
+    but only league competitions (TABLE_ZONES) get a table; cup results
+    would mix groups and knockout rounds into one ranking.
+
+    Args:
+        conn: Open connection inside the upsert transaction
+        rows: Row tuples as built by upsert_matches
+        seasons: Season label for each row
+    """
+    applied = {}
+    ids = [row[0] for row in rows if row[0] is not None]
+    for start in range(0, len(ids), 500):
+        chunk = ids[start:start + 500]
+        placeholders = ','.join('?' * len(chunk))
+        for item in conn.execute(
+            f"SELECT * FROM standings_applied WHERE match_id IN ({placeholders})", chunk
+        ):
+            applied[item['match_id']] = item
+
+    deltas = {}
+    names = {}
+    applied_rows = []
+    removed_ids = []
+    for row, season in zip(rows, seasons):
+        match_id, league_code, utc_date, status = row[0], row[1], row[3], row[4]
+        home_id, away_id, score_home, score_away = row[6], row[8], row[9], row[10]
+        counts = (
+            status == 'FINISHED' and season is not None and league_code is not None
+            and None not in (home_id, away_id, score_home, score_away)
+        )
+        new = (league_code, season, utc_date, home_id, away_id, score_home, score_away) if counts else None
+        old = applied.get(match_id)
+        old_values = None if old is None else (
+            old['league_code'], old['season'], old['utc_date'], old['home_team_id'],
+            old['away_team_id'], old['score_home'], old['score_away'])
+        if old_values == new:
+            continue
+        for values, sign in ((old_values, -1), (new, 1)):
+            if values is None or values[0] not in TABLE_ZONES:
+                continue
+            league, season_label, _, home, away, goals_home, goals_away = values
+            for team_id, goals_for, goals_against in ((home, goals_home, goals_away), (away, goals_away, goals_home)):
+                key = (league, season_label, team_id)
+                delta = _standing_delta(goals_for, goals_against, sign)
+                current = deltas.get(key, (0,) * 7)
+                deltas[key] = tuple(a + b for a, b in zip(current, delta))
+        if new is None:
+            removed_ids.append((match_id,))
+        else:
+            applied_rows.append((match_id,) + new)
+            names[(league_code, season, home_id)] = row[5]
+            names[(league_code, season, away_id)] = row[7]
+
+    if not deltas and not applied_rows and not removed_ids:
+        return
+    now_iso = datetime.utcnow().isoformat() + 'Z'
+    conn.executemany("DELETE FROM standings_applied WHERE match_id = ?", removed_ids)
+    conn.executemany(
+        """
+        INSERT INTO standings_applied (
+            match_id, league_code, season, utc_date, home_team_id, away_team_id, score_home, score_away
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(match_id) DO UPDATE SET
+            league_code=excluded.league_code,
+            season=excluded.season,
+            utc_date=excluded.utc_date,
+            home_team_id=excluded.home_team_id,
+            away_team_id=excluded.away_team_id,
+            score_home=excluded.score_home,
+            score_away=excluded.score_away
+        """,
+        applied_rows,
+    )
+    conn.executemany(
+        """
+        INSERT INTO standings (
+            league_code, season, team_id, team_name,
+            played, won, drawn, lost, goals_for, goals_against, points, updated_at
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(league_code, season, team_id) DO UPDATE SET
+            team_name=COALESCE(excluded.team_name, standings.team_name),
+            played=standings.played + excluded.played,
+            won=standings.won + excluded.won,
+            drawn=standings.drawn + excluded.drawn,
+            lost=standings.lost + excluded.lost,
+            goals_for=standings.goals_for + excluded.goals_for,
+            goals_against=standings.goals_against + excluded.goals_against,
+            points=standings.points + excluded.points,
+            updated_at=excluded.updated_at
+        """,
+        [key + (names.get(key),) + delta + (now_iso,) for key, delta in deltas.items()],
+    )
+    # Form (last five results, newest first) only for the teams that changed.
+    conn.executemany(
+        """
+        UPDATE standings SET form = COALESCE((
+            SELECT GROUP_CONCAT(result, '') FROM (
+                SELECT CASE
+                    WHEN (home_team_id = :team AND score_home > score_away)
+                      OR (away_team_id = :team AND score_away > score_home) THEN 'W'
+                    WHEN score_home = score_away THEN 'D'
+                    ELSE 'L'
+                END AS result
+                FROM standings_applied
+                WHERE league_code = :league AND season = :season
+                  AND (home_team_id = :team OR away_team_id = :team)
+                ORDER BY utc_date DESC
+                LIMIT 5
+            )
+        ), '')
+        WHERE league_code = :league AND season = :season AND team_id = :team
+        """,
+        [{'league': league, 'season': season, 'team': team_id} for league, season, team_id in deltas],
+    )
+    conn.execute("DELETE FROM standings WHERE played <= 0")
+
+
+def rebuild_standings(chunk_size=5000):
+    """Recompute standings from every finished match in the cache (backfill)."""
+    with get_db_connection() as conn:
+        conn.execute("DELETE FROM standings")
+        conn.execute("DELETE FROM standings_applied")
+        cursor = conn.execute("SELECT raw_json FROM matches WHERE status = 'FINISHED'")
+        while True:
+            batch = [json.loads(row['raw_json']) for row in cursor.fetchmany(chunk_size)]
+            if not batch:
+                break
+            rows = []
+            for match in batch:
+                full_time = match.get('score', {}).get('fullTime', {})
+                rows.append((
+                    match.get('id'), match.get('competition', {}).get('code'), None,
+                    match.get('utcDate'), match.get('status'),
+                    match.get('homeTeam', {}).get('name'), match.get('homeTeam', {}).get('id'),
+                    match.get('awayTeam', {}).get('name'), match.get('awayTeam', {}).get('id'),
+                    full_time.get('home'), full_time.get('away'),
+                ))
+            apply_standings_changes(conn, rows, [season_of(match) for match in batch])
+
+
+def get_standings(league_code, season=None):
+    """
+    Return (season, table rows) for a competition, best placed team first.
+
+    Defaults to the most recent season with finished matches in the cache.
+    Cups (competitions missing from TABLE_ZONES) have no table.
+    """
+    if league_code not in TABLE_ZONES:
+        return None, []
+    with metrics.span('db_read'):
+        with get_db_connection() as conn:
+            if season is None:
+                row = conn.execute(
+                    "SELECT MAX(season) AS season FROM standings WHERE league_code = ?",
+                    (league_code,),
+                ).fetchone()
+                season = row['season']
+            if season is None:
+                return None, []
+            rows = conn.execute(
+                """
+                SELECT team_id, team_name, played, won, drawn, lost,
+                       goals_for, goals_against, goals_for - goals_against AS goal_difference,
+                       points, form
+                FROM standings
+                WHERE league_code = ? AND season = ?
+                ORDER BY points DESC, goal_difference DESC, goals_for DESC, team_name ASC
+                """,
+                (league_code, season),
+            ).fetchall()
+    return season, [dict(row, position=index) for index, row in enumerate(rows, start=1)]
+
+
+def get_remaining_fixtures(league_code, season=None):
+    """Return (season, fixtures) still to be played, defaulting to the latest season with fixtures."""
+    placeholders = ', '.join('?' for _ in DECIDED_STATUSES)
+    with metrics.span('db_read'):
+        with get_db_connection() as conn:
+            rows = conn.execute(
+                f"""
+                SELECT raw_json FROM matches
+                WHERE league_code = ? AND status NOT IN ({placeholders})
+                ORDER BY utc_date ASC, match_id ASC
+                """,
+                (league_code, *DECIDED_STATUSES),
+            ).fetchall()
+    fixtures = [json.loads(row['raw_json']) for row in rows]
+    if season is None:
+        season = max(filter(None, map(season_of, fixtures)), default=None)
+    return season, [match for match in fixtures if season_of(match) == season]
+
+
+def remaining_share(match, now=None):
+    """
+    Share of a live match still to be played, from its kickoff time.
+
+    Assumes 90 minutes plus a 15 minute half-time; PAUSED is taken as half-time.
+    Rounded to 5 minute steps so simulation results stay cacheable.
+
+    Args:
+        match: MatchRecord of a fixture in LIVE_STATUSES
+        now: Current UTC datetime (defaults to now)
+
+    Returns:
+        Float between 0 and 1
+    """
+    if match.status == 'PAUSED':
+        return 0.5
+    try:
+        kickoff = datetime.strptime(match.utc_date[:19], '%Y-%m-%dT%H:%M:%S')
+    except (TypeError, ValueError):
+        return 1.0
+    elapsed = ((now or datetime.utcnow()) - kickoff).total_seconds() / 60
+    if elapsed > 60:
+        elapsed -= 15
+    elif elapsed > 45:
+        elapsed = 45
+    played = min(max(elapsed, 0), 90) // 5 * 5
+    return (90 - played) / 90
+
+
+def simulate_league(league_code, simulations=SIMULATION_RUNS, seed=0):
+    """
+    Monte Carlo simulation of the rest of a league season.
+
+    Starts from the incrementally maintained standings and samples every
+    remaining fixture from the prediction model's expected goals. Results are
+    cached until the table, the fixtures or their expectations change.
+
+    Args:
+        league_code: Competition code present in TABLE_ZONES
+        simulations: Number of simulated seasons
+        seed: Seed for reproducible results
+
+    Returns:
+        Dictionary with title, qualification and relegation probabilities per team
+    """
+    season, table = get_standings(league_code)
+    fixture_season, fixtures = get_remaining_fixtures(league_code)
+    if fixture_season is not None and (season is None or fixture_season > season):
+        # Pre-season: the new fixtures are out, nobody has played yet.
+        season, table = fixture_season, []
+    elif fixture_season != season:
+        fixtures = []
+    if season is None:
+        return None
+
+    teams = [{'id': row['team_id'], 'name': row['team_name'], 'position': row['position'],
+              'points': row['points'], 'goal_difference': row['goal_difference'],
+              'goals_for': row['goals_for']} for row in table]
+    team_index = {team['id']: index for index, team in enumerate(teams)}
+    for match in fixtures:
+        for side in ('homeTeam', 'awayTeam'):
+            team = match.get(side, {})
+            if team.get('id') not in team_index:
+                team_index[team.get('id')] = len(teams)
+                teams.append({'id': team.get('id'), 'name': team.get('name'), 'position': None,
+                              'points': 0, 'goal_difference': 0, 'goals_for': 0})
+
+    records = [as_record(match) for match in fixtures]
+    live = [record.status in LIVE_STATUSES and record.score_home is not None and record.score_away is not None
+            for record in records]
+    with metrics.span('predict'):
+        # Pre-kickoff expectations: with a score the model would echo it back.
+        expected = [generate_prediction(MatchRecord(
+            record.id, record.league_code, record.competition_name, record.utc_date, 'SCHEDULED',
+            record.home_team, record.home_team_id, record.away_team, record.away_team_id,
+        ))['expected_goals'] for record in records]
+    base = tuple([team[column] for team in teams] for column in ('points', 'goal_difference', 'goals_for'))
+    schedule = (
+        [team_index[record.home_team_id] for record in records],
+        [team_index[record.away_team_id] for record in records],
+        [goals['home'] for goals in expected],
+        [goals['away'] for goals in expected],
+        [record.score_home if is_live else 0 for record, is_live in zip(records, live)],
+        [record.score_away if is_live else 0 for record, is_live in zip(records, live)],
+        [remaining_share(record) if is_live else 1.0 for record, is_live in zip(records, live)],
+    )
+    fingerprint = hashlib.sha1(json.dumps(
+        [league_code, season, simulations, seed, [team['id'] for team in teams], base, schedule]
+    ).encode()).hexdigest()
+    cached = simulation_cache.get(fingerprint)
+    if cached is not None:
+        metrics.incr('cache_hits', cache='simulation')
+        return cached
+
+    import simulation  # NumPy stays out of the startup path
+
+    with metrics.span('simulate'):
+        positions, expected_points = simulation.run_simulation(
+            base, schedule, simulations=simulations, seed=seed, workers=SIMULATION_WORKERS)
+    zones = TABLE_ZONES[league_code]
+    relegation_from = len(teams) - zones['relegation']
+    results = [{
+        'team_id': team['id'],
+        'team_name': team['name'],
+        'position': team['position'],
+        'points': team['points'],
+        'expected_points': round(float(expected_points[index]), 2),
+        'title': round(float(positions[index, 0]), 4),
+        'qualification': round(float(positions[index, :zones['qualification']].sum()), 4),
+        'relegation': round(float(positions[index, relegation_from:].sum()), 4),
+        'position_probabilities': [round(float(p), 4) for p in positions[index]],
+    } for index, team in enumerate(teams)]
+    results.sort(key=lambda row: (-row['expected_points'], row['team_name'] or ''))
+
+    simulation_result = {
+        'league_code': league_code,
+        'season': season,
+        'simulations': simulations,
+        'seed': seed,
+        'remaining_fixtures': len(fixtures),
+        'zones': zones,
+        'teams': results,
+    }
+    simulation_cache.set(fingerprint, simulation_result)
+    return simulation_result
+
+
+class ExportInProgress(Exception):
+    """Another process or thread holds the export lease."""
+
+
+def export_matches(output_dir=None, file_format='parquet', full=False, claimed=False):
+    """
+    Write changed matches plus predictions as league/season partitioned files.
+
+    Only one export runs at a time across workers and the CLI: the lease is
+    the EXPORT_STATE_KEY row of sync_state, which also records the outcome.
+
+    Args:
+        output_dir: Export directory (defaults to EXPORT_DIR)
+        file_format: 'parquet' or 'arrow'
+        full: Re-export every match instead of rows changed since the last run
+        claimed: The caller already holds the export lease
+
+    Returns:
+        Summary with row count, written files and the change_seq watermark
+
+    Raises:
+        ExportInProgress: when another export holds the lease
+    """
+    import export  # pyarrow stays out of the startup path
+
+    if not claimed and not claim_sync(EXPORT_STATE_KEY, lease_seconds=EXPORT_LEASE_SECONDS, daily=False):
+        raise ExportInProgress("another export is running")
+    try:
+        summary = export.export_matches(get_db_connection, output_dir or EXPORT_DIR, generate_prediction,
+                                        season_of, full=full, file_format=file_format)
+    except BaseException as e:
+        mark_sync_state(EXPORT_STATE_KEY, 'error', f"{type(e).__name__}: {e}")
+        raise
+    mark_sync_state(EXPORT_STATE_KEY, 'success', f"{summary['rows']} row(s)")
+    return summary
+
+
+def run_export_job(file_format):
+    """Background body of POST /api/export (the lease is already held)."""
+    try:
+        export_matches(file_format=file_format, claimed=True)
+    except Exception as e:
+        print(f"ERROR: Export failed: {type(e).__name__}: {e}")
+
+
+def request_matches_from_api(league_code=None, date_from=None, date_to=None, timeout=FOOTBALL_DATA_DEADLINE,
+                             match_ids=None):
+    """
+    Send a single request to Football Data API.
+
+    ``match_ids`` restricts the answer to those matches (Football Data ``ids`` filter).
+
+    Raises:
+        SourceError: on any non-200 answer, so the data-source layer can
+            trip its circuit breaker and fall back
+    """
     if league_code and league_code in LEAGUES:
         competition_id = LEAGUES[league_code]
         url = f'{FOOTBALL_DATA_BASE_URL}/competitions/{competition_id}/matches'
@@ -221,27 +994,182 @@ def fetch_matches_from_api(league_code=None, date_from=None, date_to=None):
         params['dateFrom'] = date_from
     if date_to:
         params['dateTo'] = date_to
+    if match_ids:
+        params['ids'] = ','.join(str(match_id) for match_id in match_ids)
 
-    response = None
-    for attempt in range(3):
-        try:
-            response = requests.get(url, headers=get_headers(), params=params, timeout=12)
-            break
-        except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
-            if attempt == 2:
-                raise e
+    metrics.incr('api_calls')
+    response = requests.get(url, headers=get_headers(), params=params, timeout=timeout)
 
     if response.status_code == 200:
         return response.json().get('matches', [])
     if response.status_code == 401:
         print("ERROR: API authentication failed - Invalid API key")
-        return []
+        raise SourceError('authentication failed', 401)
     if response.status_code == 429:
+        metrics.incr('api_rate_limited')
         print("WARNING: API rate limit exceeded - Too many requests")
-        return []
+        raise SourceError('rate limit exceeded', 429)
 
     print(f"ERROR: API returned status {response.status_code}: {response.text}")
-    return []
+    raise SourceError(f'unexpected status {response.status_code}', response.status_code)
+
+
+def fetch_matches_from_soccerdata(league_code=None, date_from=None, date_to=None, timeout=None):
+    """
+    Fetch fixtures from FBref through soccerdata, shaped like Football Data matches.
+
+    Used as a fallback provider when USE_SOCCERDATA=true. soccerdata has no
+    timeout knob; the data-source layer abandons the call at its deadline.
+    """
+    import soccerdata as sd
+
+    league = SOCCERDATA_LEAGUES.get(league_code)
+    if not league:
+        return []
+    fbref = sd.FBref(leagues=[league], seasons=get_recent_season_codes(1), proxy=FBREF_PROXY)
+    schedule = fbref.read_schedule().reset_index()
+
+    date_col = get_first_existing_column(schedule, ['date', 'Date'])
+    home_col = get_first_existing_column(schedule, ['Home', 'home_team'])
+    away_col = get_first_existing_column(schedule, ['Away', 'away_team'])
+    score_col = get_first_existing_column(schedule, ['Score', 'score'])
+    id_col = get_first_existing_column(schedule, ['game_id', 'game'])
+    if not date_col or not home_col or not away_col:
+        return []
+
+    matches = []
+    for row in schedule.to_dict('records'):
+        day = str(row[date_col])[:10]
+        if (date_from and day < date_from) or (date_to and day > date_to):
+            continue
+        score = re.match(r'^(\d+)\s*[\-–]\s*(\d+)$', str(row.get(score_col, '')).strip()) if score_col else None
+        game_key = str(row[id_col]) if id_col else f"{day}|{row[home_col]}|{row[away_col]}"
+        matches.append({
+            # Stable 48-bit id that cannot collide with Football Data's small ids.
+            'id': int(hashlib.sha1(game_key.encode()).hexdigest()[:12], 16),
+            'utcDate': f"{day}T00:00:00Z",
+            'status': 'FINISHED' if score else 'SCHEDULED',
+            'competition': {'code': league_code, 'name': LEAGUE_NAMES.get(league_code, league_code)},
+            'homeTeam': {'id': None, 'name': row[home_col]},
+            'awayTeam': {'id': None, 'name': row[away_col]},
+            'score': {'fullTime': {
+                'home': int(score.group(1)) if score else None,
+                'away': int(score.group(2)) if score else None,
+            }},
+        })
+    return matches
+
+
+# Upstream providers in priority order; SQLite is the last resort in get_matches.
+data_sources = DataSourceChain(
+    [
+        DataSource('football_data', request_matches_from_api, deadline=FOOTBALL_DATA_DEADLINE,
+                   default_hedge_delay=HEDGE_DEFAULT_DELAY),
+        DataSource('soccerdata', fetch_matches_from_soccerdata, deadline=SOCCERDATA_DEADLINE,
+                   hedge=False, max_in_flight=SOCCERDATA_MAX_IN_FLIGHT,
+                   supports=lambda league_code, *_: USE_SOCCERDATA and bool(SOCCERDATA_LEAGUES.get(league_code))),
+    ],
+    total_deadline=SOURCES_TOTAL_DEADLINE,
+    metrics=metrics,
+)
+
+
+# Lookups by id come from anonymous requests: they get their own breaker and
+# rate limit so they can neither drain the quota nor open the sync circuit.
+id_lookup_breaker = CircuitBreaker()
+id_lookup_limiter = RateLimiter(ID_LOOKUP_RATE_LIMIT)
+
+
+def fetch_matches_from_api(league_code=None, date_from=None, date_to=None):
+    """
+    Fetch matches from the upstream providers (Football Data first).
+
+    Raises:
+        SourcesUnavailable: when no provider answered within its deadline
+    """
+    return data_sources.fetch(league_code, date_from, date_to)
+
+
+def fetch_matches_by_ids(match_ids):
+    """
+    Fetch specific matches from Football Data in a single request.
+
+    Goes through id_lookup_limiter and id_lookup_breaker, never the sync
+    provider's breaker.
+
+    Returns:
+        List of matches, or None when the lookup was skipped or failed (the
+        ids are then unknown rather than missing upstream)
+    """
+    source = 'football_data_ids'
+    if not id_lookup_limiter.allow():
+        metrics.incr('source_throttled', source=source)
+        return None
+    if not id_lookup_breaker.allow():
+        metrics.incr('source_circuit_open', source=source)
+        return None
+    try:
+        with metrics.span('api_fetch'):
+            matches = request_matches_from_api(match_ids=match_ids, timeout=FOOTBALL_DATA_DEADLINE)
+    except (SourceError, requests.exceptions.RequestException) as e:
+        id_lookup_breaker.record_failure()
+        metrics.incr('source_failures', source=source)
+        print(f"WARNING: Could not fetch matches {match_ids} from Football Data: {e}")
+        return None
+    id_lookup_breaker.record_success()
+    return matches
+
+
+def fetch_match_records(conn, sql, params=()):
+    """Run a query selecting MATCH_COLUMNS (in order) and return MatchRecords."""
+    cursor = conn.cursor()
+    # Plain tuples: sqlite3.Row objects would be built only to be unpacked.
+    cursor.row_factory = None
+    return list(starmap(MatchRecord, cursor.execute(sql, params)))
+
+
+def get_matches_by_ids(match_ids):
+    """Load matches from local SQLite cache with a single IN query, keyed by id."""
+    if not match_ids:
+        return {}
+    placeholders = ', '.join('?' for _ in match_ids)
+    with metrics.span('db_read'):
+        with get_db_connection() as conn:
+            records = fetch_match_records(
+                conn,
+                f"SELECT {MATCH_COLUMNS_SQL} FROM matches WHERE match_id IN ({placeholders})",
+                list(match_ids),
+            )
+    return {record.id: record for record in records}
+
+
+def resolve_matches(match_ids):
+    """
+    Return {match_id: match} from SQLite, fetching only the missing ids upstream.
+
+    Missing ids are requested in one Football Data call (skipped in sidecar
+    mode, where web workers never reach upstream) and cached for next time.
+    Ids Football Data does not know are remembered for MISSING_MATCH_TTL
+    seconds and not requested again.
+    """
+    matches = get_matches_by_ids(match_ids)
+    missing = [
+        match_id for match_id in match_ids
+        if match_id not in matches and not missing_match_ids_cache.get(str(match_id))
+    ]
+    if not missing:
+        metrics.incr('cache_hits', cache='sqlite')
+    elif SYNC_MODE != 'sidecar':
+        wanted = set(missing)
+        fetched = fetch_matches_by_ids(sorted(wanted))
+        if fetched is not None:
+            fetched = [match for match in fetched if match.get('id') in wanted]
+            if fetched:
+                upsert_matches(fetched)
+                matches.update((match['id'], MatchRecord.from_dict(match)) for match in fetched)
+            for match_id in wanted.difference(matches):
+                missing_match_ids_cache.set(str(match_id), True)
+    return matches
 
 
 def get_matches_from_db(league_code=None, date_from=None, date_to=None):
@@ -259,10 +1187,166 @@ def get_matches_from_db(league_code=None, date_from=None, date_to=None):
         params.append(date_to)
 
     where_sql = f"WHERE {' AND '.join(where)}" if where else ""
-    query = f"SELECT raw_json FROM matches {where_sql} ORDER BY utc_date ASC"
-    with get_db_connection() as conn:
-        rows = conn.execute(query, params).fetchall()
-    return [json.loads(row['raw_json']) for row in rows]
+    query = f"SELECT {MATCH_COLUMNS_SQL} FROM matches {where_sql} ORDER BY utc_date ASC"
+    with metrics.span('db_read'):
+        with get_db_connection() as conn:
+            return fetch_match_records(conn, query, params)
+
+def build_fts_query(text):
+    """Turn free text into an FTS5 query matching every word as a prefix."""
+    terms = re.findall(r'\w+', text or '')
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def search_matches(query, league_code=None, date_from=None, date_to=None, limit=SEARCH_RESULT_LIMIT):
+    """
+    Search cached matches by team or competition name.
+
+    Results are ranked by BM25 (team names weigh more than the competition)
+    and then by distance of the kickoff from today.
+    """
+    fts_query = build_fts_query(query)
+    if not fts_query:
+        return []
+    where = ["matches_fts MATCH ?"]
+    params = [fts_query]
+    if league_code:
+        where.append("m.league_code = ?")
+        params.append(league_code)
+    if date_from:
+        where.append("substr(m.utc_date, 1, 10) >= ?")
+        params.append(date_from)
+    if date_to:
+        where.append("substr(m.utc_date, 1, 10) <= ?")
+        params.append(date_to)
+    params.append(limit)
+
+    sql = f"""
+        SELECT {', '.join('m.' + column for column in MATCH_COLUMNS)}
+        FROM matches_fts
+        JOIN matches m ON m.match_id = matches_fts.rowid
+        WHERE {' AND '.join(where)}
+        ORDER BY bm25(matches_fts, 10.0, 10.0, 1.0),
+                 abs(julianday(substr(m.utc_date, 1, 19)) - julianday('now'))
+        LIMIT ?
+    """
+    with metrics.span('db_read'):
+        with get_db_connection() as conn:
+            return fetch_match_records(conn, sql, params)
+
+# Finished matches of one team seen from its side: goals for (gf) / against (ga).
+# Each half of the UNION uses its own (team_id, utc_date) index.
+TEAM_RESULTS_SQL = """
+    SELECT match_id, utc_date, 1 AS is_home, score_home AS gf, score_away AS ga
+    FROM matches
+    WHERE home_team_id = :team AND status = 'FINISHED' AND score_home IS NOT NULL
+      AND (:opponent IS NULL OR away_team_id = :opponent)
+      AND (:before IS NULL OR utc_date < :before)
+    UNION ALL
+    SELECT match_id, utc_date, 0 AS is_home, score_away AS gf, score_home AS ga
+    FROM matches
+    WHERE away_team_id = :team AND status = 'FINISHED' AND score_away IS NOT NULL
+      AND (:opponent IS NULL OR home_team_id = :opponent)
+      AND (:before IS NULL OR utc_date < :before)
+    ORDER BY utc_date DESC
+    LIMIT :limit
+"""
+
+
+def summarize_team_results(team_id, opponent_id=None, limit=TEAM_HISTORY_LIMIT, before=None):
+    """
+    Aggregate W/D/L and goals for a team over its last ``limit`` finished matches.
+
+    Args:
+        team_id: Football Data team id
+        opponent_id: Restrict to matches against this team (head-to-head)
+        limit: Number of most recent finished matches to consider
+        before: Only use matches kicking off before this ISO date/datetime
+
+    Returns:
+        Dictionary with played, wins, draws, losses, goals and a form string
+    """
+    params = {'team': team_id, 'opponent': opponent_id, 'before': before, 'limit': limit}
+    with metrics.span('db_read'):
+        with get_db_connection() as conn:
+            totals = conn.execute(
+                f"""
+                SELECT COUNT(*) AS played,
+                       COALESCE(SUM(gf > ga), 0) AS wins,
+                       COALESCE(SUM(gf = ga), 0) AS draws,
+                       COALESCE(SUM(gf < ga), 0) AS losses,
+                       COALESCE(SUM(gf), 0) AS goals_for,
+                       COALESCE(SUM(ga), 0) AS goals_against,
+                       COALESCE(SUM(is_home), 0) AS home_matches,
+                       GROUP_CONCAT(CASE WHEN gf > ga THEN 'W' WHEN gf = ga THEN 'D' ELSE 'L' END, '') AS form
+                FROM ({TEAM_RESULTS_SQL})
+                """,
+                params,
+            ).fetchone()
+    summary = dict(totals)
+    summary['away_matches'] = summary['played'] - summary['home_matches']
+    summary['form'] = summary['form'] or ''
+    return summary
+
+
+def _compact_match_row(row):
+    """Convert a matches row into the compact JSON shape used by history APIs."""
+    return {
+        'match_id': row['match_id'],
+        'date': row['utc_date'],
+        'league_code': row['league_code'],
+        'competition': row['competition_name'],
+        'status': row['status'],
+        'home_team': {'id': row['home_team_id'], 'name': row['home_team']},
+        'away_team': {'id': row['away_team_id'], 'name': row['away_team']},
+        'score': {'home': row['score_home'], 'away': row['score_away']},
+    }
+
+
+def get_team_matches(team_id, opponent_id=None, limit=TEAM_HISTORY_LIMIT, before=None):
+    """Return a team's most recent cached matches (any status), newest first."""
+    with metrics.span('db_read'):
+        with get_db_connection() as conn:
+            rows = conn.execute(
+                """
+                SELECT * FROM (
+                    SELECT * FROM matches
+                    WHERE home_team_id = :team
+                      AND (:opponent IS NULL OR away_team_id = :opponent)
+                      AND (:before IS NULL OR utc_date < :before)
+                    UNION ALL
+                    SELECT * FROM matches
+                    WHERE away_team_id = :team
+                      AND (:opponent IS NULL OR home_team_id = :opponent)
+                      AND (:before IS NULL OR utc_date < :before)
+                )
+                ORDER BY utc_date DESC
+                LIMIT :limit
+                """,
+                {'team': team_id, 'opponent': opponent_id, 'before': before, 'limit': limit},
+            ).fetchall()
+    return [_compact_match_row(row) for row in rows]
+
+
+def get_team_statistics_from_db(team_id, before=None, limit=TEAM_HISTORY_LIMIT):
+    """
+    Team statistics from the local cache, in the same shape as get_team_statistics.
+
+    Returns:
+        Dictionary with team statistics or None if the team has no finished matches
+    """
+    if not team_id:
+        return None
+    summary = summarize_team_results(team_id, limit=limit, before=before)
+    if summary['played'] == 0:
+        return None
+    return {
+        'avg_goals_scored': round(summary['goals_for'] / summary['played'], 2),
+        'avg_goals_conceded': round(summary['goals_against'] / summary['played'], 2),
+        'total_matches': summary['played'],
+        'home_matches': summary['home_matches'],
+        'away_matches': summary['away_matches'],
+    }
 
 def get_headers():
     """Get headers for Football Data API requests"""
@@ -286,38 +1370,83 @@ def get_first_existing_column(df, candidates):
             return col
     return None
 
-def get_matches(league_code=None, date_from=None, date_to=None):
+def sync_window(league_code=None, date_from=None, date_to=None):
     """
-    Fetch matches from local SQLite cache and sync daily with Football Data API.
-    
-    Args:
-        league_code: League code (CL, PL, PD, BL1, EC, SA, EL, CLI)
-        date_from: Start date (YYYY-MM-DD)
-        date_to: End date (YYYY-MM-DD)
-    
+    Sync one request window from Football Data API into SQLite.
+
+    Runs at most once per day per window and only in the process that wins
+    claim_sync, so multiple workers never duplicate upstream traffic.
+    Matches from a fallback provider (FBref ids and team names) are kept in
+    fallback_matches_cache instead of SQLite and the window is marked
+    'fallback', so Football Data is asked again after
+    SYNC_FALLBACK_RETRY_SECONDS.
+
     Returns:
-        List of matches
+        True if this call fetched from the API successfully
     """
     cache_key = build_cache_key(league_code, date_from, date_to)
+    if not should_sync_today(cache_key) or not claim_sync(cache_key):
+        metrics.incr('cache_hits', cache='sqlite')
+        return False
     try:
-        if should_sync_today(cache_key):
-            matches = fetch_matches_from_api(league_code, date_from, date_to)
+        with metrics.span('sync'):
+            with metrics.span('api_fetch'):
+                source_name, matches = data_sources.fetch_with_source(league_code, date_from, date_to)
+            if source_name != data_sources.sources[0].name:
+                fallback_matches_cache.set(cache_key, matches)
+                mark_sync_state(cache_key, 'fallback', f"served by {source_name}")
+                return False
             upsert_matches(matches)
+            fallback_matches_cache.delete(cache_key)
             mark_sync_state(cache_key, 'success')
-
-        return get_matches_from_db(league_code, date_from, date_to)
+        return True
+    except SourcesUnavailable as e:
+        print(f"WARNING: No data source available, serving SQLite cache: {e}")
+        mark_sync_state(cache_key, 'error', f"unavailable: {e}")
     except requests.exceptions.Timeout:
         print("WARNING: API request timeout")
         mark_sync_state(cache_key, 'error', 'timeout')
-        return get_matches_from_db(league_code, date_from, date_to)
     except requests.exceptions.ConnectionError:
         print("WARNING: Unable to connect to API - Network issue or API unavailable")
         mark_sync_state(cache_key, 'error', 'connection_error')
-        return get_matches_from_db(league_code, date_from, date_to)
     except Exception as e:
         print(f"ERROR: Unexpected error fetching matches: {type(e).__name__}: {e}")
         mark_sync_state(cache_key, 'error', f"{type(e).__name__}: {e}")
-        return get_matches_from_db(league_code, date_from, date_to)
+    return False
+
+
+def default_sync_windows():
+    """Return the (league_code, date_from, date_to) windows the web routes request."""
+    now = datetime.now()
+    today, tomorrow, week, fortnight = (
+        (now + timedelta(days=offset)).strftime('%Y-%m-%d') for offset in (0, 1, 7, 14)
+    )
+    windows = [(None, None, None), (None, today, tomorrow), (None, today, week)]
+    for league_code in LEAGUES:
+        windows.append((league_code, today, week))
+        windows.append((league_code, today, fortnight))
+    return windows
+
+def get_matches(league_code=None, date_from=None, date_to=None):
+    """
+    Fetch matches from local SQLite cache and sync daily with Football Data API.
+    
+    Args:
+        league_code: League code (CL, PL, PD, BL1, EC, SA, EL, CLI)
+        date_from: Start date (YYYY-MM-DD)
+        date_to: End date (YYYY-MM-DD)
+    
+    Returns:
+        List of matches
+    """
+    if SYNC_MODE != 'sidecar':
+        sync_window(league_code, date_from, date_to)
+    matches = get_matches_from_db(league_code, date_from, date_to)
+    if not matches:
+        fallback = fallback_matches_cache.get(build_cache_key(league_code, date_from, date_to))
+        if fallback:
+            matches = [MatchRecord.from_dict(match) for match in sorted(fallback, key=lambda m: m.get('utcDate') or '')]
+    return matches
 
 def get_team_statistics(team_name, league_code, seasons=1):
     """
@@ -333,8 +1462,10 @@ def get_team_statistics(team_name, league_code, seasons=1):
     """
     try:
         cache_key = f"{league_code}_{team_name}"
-        if cache_key in historical_stats_cache:
-            return historical_stats_cache[cache_key]
+        cached = historical_stats_cache.get(cache_key)
+        if cached is not None:
+            metrics.incr('cache_hits', cache='team_stats')
+            return cached
         
         league = SOCCERDATA_LEAGUES.get(league_code)
         if not league:
@@ -348,6 +1479,9 @@ def get_team_statistics(team_name, league_code, seasons=1):
         if not season_codes:
             return None
 
+        # soccerdata pulls in pandas and takes seconds to import; only pay for it here.
+        import soccerdata as sd
+
         # Get match results using FBref (more reliable for stats)
         fbref = sd.FBref(leagues=[league], seasons=season_codes, proxy=FBREF_PROXY)
         
@@ -399,14 +1533,14 @@ def get_team_statistics(team_name, league_code, seasons=1):
         total_matches = len(team_matches)
         
         stats = {
-            'avg_goals_scored': round(goals_scored / total_matches, 2) if total_matches > 0 else 1.5,
-            'avg_goals_conceded': round(goals_conceded / total_matches, 2) if total_matches > 0 else 1.2,
+            'avg_goals_scored': round(float(goals_scored) / total_matches, 2) if total_matches > 0 else 1.5,
+            'avg_goals_conceded': round(float(goals_conceded) / total_matches, 2) if total_matches > 0 else 1.2,
             'total_matches': total_matches,
             'home_matches': len(home_matches),
             'away_matches': len(away_matches)
         }
         
-        historical_stats_cache[cache_key] = stats
+        historical_stats_cache.set(cache_key, stats)
         return stats
         
     except Exception as e:
@@ -418,27 +1552,35 @@ def generate_prediction(match):
     Generate predictions for a match based on real historical statistics from soccerdata
     
     Args:
-        match: Match data from API
+        match: MatchRecord, or match data from API
     
     Returns:
         Dictionary with predictions
     """
-    home_team = match.get('homeTeam', {}).get('name', 'Home Team')
-    away_team = match.get('awayTeam', {}).get('name', 'Away Team')
-    league_code = match.get('competition', {}).get('code', 'PL')
+    match = as_record(match)
+    home_team = match.home_team or 'Home Team'
+    away_team = match.away_team or 'Away Team'
+    league_code = match.league_code or 'PL'
     
     home_stats = None
     away_stats = None
+    data_source = 'football_data'
 
     # Keep soccerdata path available but disabled by default.
     if USE_SOCCERDATA:
         home_stats = get_team_statistics(home_team, league_code, seasons=2)
         away_stats = get_team_statistics(away_team, league_code, seasons=2)
+        data_source = 'soccerdata'
+
+    # Local SQLite history needs no network; only matches before kickoff count.
+    if USE_LOCAL_HISTORY and not (home_stats and away_stats):
+        home_stats = get_team_statistics_from_db(match.home_team_id, before=match.utc_date)
+        away_stats = get_team_statistics_from_db(match.away_team_id, before=match.utc_date)
+        data_source = 'local_history'
 
     # Use completed match score from FOOTBALL_DATA when available.
-    full_time = match.get('score', {}).get('fullTime', {})
-    home_ft = full_time.get('home')
-    away_ft = full_time.get('away')
+    home_ft = match.score_home
+    away_ft = match.score_away
     has_real_score = home_ft is not None and away_ft is not None
 
     if has_real_score:
@@ -447,7 +1589,7 @@ def generate_prediction(match):
         home_expected = float(home_score)
         away_expected = float(away_score)
     elif home_stats and away_stats:
-        # Optional soccerdata-based path (disabled unless USE_SOCCERDATA=true).
+        # Optional history-based path (USE_SOCCERDATA or USE_LOCAL_HISTORY).
         home_avg_goals = home_stats['avg_goals_scored']
         away_avg_goals = away_stats['avg_goals_scored']
         home_avg_conceded = home_stats['avg_goals_conceded']
@@ -459,9 +1601,9 @@ def generate_prediction(match):
         away_score = min(int(round(away_expected)), 3)
     else:
         # FOOTBALL_DATA-only deterministic estimate from team IDs for scheduled matches.
-        home_id = match.get('homeTeam', {}).get('id') or 0
-        away_id = match.get('awayTeam', {}).get('id') or 0
-        base = (home_id + away_id + (match.get('id') or 0)) % 5
+        home_id = match.home_team_id or 0
+        away_id = match.away_team_id or 0
+        base = (home_id + away_id + (match.id or 0)) % 5
         home_score = 1 + (base // 2)
         away_score = base % 2
         home_expected = float(home_score)
@@ -482,15 +1624,19 @@ def generate_prediction(match):
     total_goals = home_score + away_score
     
     prediction = {
-        'match_id': match.get('id'),
+        'match_id': match.id,
         'home_team': home_team,
         'away_team': away_team,
-        'date': match.get('utcDate'),
-        'competition': match.get('competition', {}).get('name', 'Unknown'),
+        'date': match.utc_date,
+        'competition': match.competition_name or 'Unknown',
         'predicted_score': f'{home_score}-{away_score}',
+        'expected_goals': {
+            'home': round(home_expected, 2),
+            'away': round(away_expected, 2)
+        },
         'predicted_result': result,
         'confidence': f'{int(probability * 100)}%',
-        'data_source': 'football_data' if not home_stats or not away_stats else 'soccerdata',
+        'data_source': data_source if home_stats and away_stats else 'football_data',
         'goals_prediction': {
             'total_goals': total_goals,
             'over_2_5': total_goals > 2.5,
@@ -526,6 +1672,16 @@ def generate_prediction(match):
     
     return prediction
 
+@app.before_request
+def start_request_timer():
+    """Start timing the request when instrumentation is enabled"""
+    metrics.start_request()
+
+@app.after_request
+def add_server_timing(response):
+    """Expose collected spans through the Server-Timing header"""
+    return metrics.finish_request(response, request.endpoint)
+
 @app.route('/')
 def home():
     """Home page showing today's match predictions"""
@@ -536,12 +1692,14 @@ def home():
     matches = get_matches(date_from=today, date_to=tomorrow)
     
     # Generate predictions for each match
-    predictions = [p for p in (generate_prediction(match) for match in matches[:10]) if p is not None]
+    with metrics.span('predict'):
+        predictions = [p for p in (generate_prediction(match) for match in matches[:10]) if p is not None]
     
-    return render_template('index.html', 
-                         predictions=predictions, 
-                         date=today,
-                         leagues=LEAGUES)
+    with metrics.span('render'):
+        return render_template('index.html', 
+                             predictions=predictions, 
+                             date=today,
+                             leagues=LEAGUES)
 
 @app.route('/search')
 def search():
@@ -561,25 +1719,238 @@ def api_predictions():
         date_to = (datetime.now() + timedelta(days=7)).strftime('%Y-%m-%d')
     
     matches = get_matches(league_code, date_from, date_to)
-    predictions = [p for p in (generate_prediction(match) for match in matches) if p is not None]
+    with metrics.span('predict'):
+        predictions = [p for p in (generate_prediction(match) for match in matches) if p is not None]
     
+    with metrics.span('render'):
+        return jsonify({
+            'success': True,
+            'count': len(predictions),
+            'predictions': predictions
+        })
+
+@app.route('/api/predictions/batch', methods=['POST'])
+def api_predictions_batch():
+    """API endpoint with predictions for a list of match ids, keyed by id"""
+    payload = request.get_json(silent=True) or {}
+    match_ids = payload.get('match_ids')
+    if not isinstance(match_ids, list) or not match_ids or \
+            not all(isinstance(match_id, int) and not isinstance(match_id, bool) for match_id in match_ids):
+        return jsonify({
+            'success': False,
+            'error': "Body must be JSON with a non-empty 'match_ids' list of integers"
+        }), 400
+    match_ids = list(dict.fromkeys(match_ids))
+    if len(match_ids) > PREDICTION_BATCH_LIMIT:
+        return jsonify({
+            'success': False,
+            'error': f'At most {PREDICTION_BATCH_LIMIT} match ids per request'
+        }), 400
+
+    matches = resolve_matches(match_ids)
+    predictions = {}
+    unavailable = []
+    with metrics.span('predict'):
+        for match_id in match_ids:
+            match = matches.get(match_id)
+            prediction = generate_prediction(match) if match else None
+            if prediction is None:
+                unavailable.append(match_id)
+            else:
+                predictions[str(match_id)] = prediction
+
+    with metrics.span('render'):
+        return jsonify({
+            'success': True,
+            'count': len(predictions),
+            'predictions': predictions,
+            # Unknown ids and matches without enough data for a prediction.
+            'missing': unavailable
+        })
+
+@app.route('/api/search')
+def api_search():
+    """API endpoint for ranked team/competition search over the local cache"""
+    query = (request.args.get('q') or '').strip()
+    if not query:
+        return jsonify({
+            'success': False,
+            'error': 'Missing search query (q)'
+        }), 400
+    limit = min(request.args.get('limit', SEARCH_RESULT_LIMIT, type=int), SEARCH_RESULT_LIMIT)
+
+    matches = search_matches(
+        query,
+        league_code=request.args.get('league'),
+        date_from=request.args.get('date_from'),
+        date_to=request.args.get('date_to'),
+        limit=max(limit, 1),
+    )
+    with metrics.span('predict'):
+        predictions = [p for p in (generate_prediction(match) for match in matches) if p is not None]
+
+    with metrics.span('render'):
+        return jsonify({
+            'success': True,
+            'query': query,
+            'count': len(predictions),
+            'predictions': predictions
+        })
+
+@app.route('/api/team/<int:team_id>/matches')
+def api_team_matches(team_id):
+    """API endpoint with a team's recent matches and form from the local cache"""
+    limit = min(max(request.args.get('limit', TEAM_HISTORY_LIMIT, type=int), 1), 100)
+    before = request.args.get('before')
+
+    matches = get_team_matches(team_id, limit=limit, before=before)
+    if not matches:
+        return jsonify({
+            'success': False,
+            'error': 'Team not found in local cache'
+        }), 404
+    latest = matches[0]
+    side = 'home_team' if latest['home_team']['id'] == team_id else 'away_team'
+    return jsonify({
+        'success': True,
+        'team': latest[side],
+        'form': summarize_team_results(team_id, limit=limit, before=before),
+        'matches': matches
+    })
+
+@app.route('/api/h2h/<int:team_a>/<int:team_b>')
+def api_head_to_head(team_a, team_b):
+    """API endpoint with the head-to-head record between two teams"""
+    limit = min(max(request.args.get('limit', TEAM_HISTORY_LIMIT, type=int), 1), 100)
+    before = request.args.get('before')
+
+    matches = get_team_matches(team_a, opponent_id=team_b, limit=limit, before=before)
+    summary = summarize_team_results(team_a, opponent_id=team_b, limit=limit, before=before)
+    teams = {}
+    for match in matches:
+        for side in ('home_team', 'away_team'):
+            teams.setdefault(match[side]['id'], match[side])
+    return jsonify({
+        'success': True,
+        'team_a': teams.get(team_a, {'id': team_a, 'name': None}),
+        'team_b': teams.get(team_b, {'id': team_b, 'name': None}),
+        # W/D/L and goals are from team_a's point of view.
+        'summary': summary,
+        'matches': matches
+    })
+
+@app.route('/api/standings/<league_code>')
+def api_standings(league_code):
+    """API endpoint with the incrementally maintained league table"""
+    if league_code not in LEAGUES:
+        return jsonify({
+            'success': False,
+            'error': 'League not found'
+        }), 404
+    if league_code not in TABLE_ZONES:
+        return jsonify({
+            'success': False,
+            'error': 'League table not available for this competition'
+        }), 404
+    season, table = get_standings(league_code, request.args.get('season'))
     return jsonify({
         'success': True,
-        'count': len(predictions),
-        'predictions': predictions
+        'league_code': league_code,
+        'league_name': LEAGUE_NAMES.get(league_code, league_code),
+        'season': season,
+        'standings': table
     })
 
+@app.route('/api/simulation/<league_code>')
+def api_simulation(league_code):
+    """API endpoint with Monte Carlo title, qualification and relegation odds"""
+    if league_code not in TABLE_ZONES:
+        return jsonify({
+            'success': False,
+            'error': 'League table not available for this competition'
+        }), 404
+    # Anonymous callers pick from a few cached variants only: every new seed
+    # or run count would be a fresh simulation and a new cache entry.
+    requested = request.args.get('simulations', SIMULATION_RUNS, type=int) or SIMULATION_RUNS
+    simulations = max([runs for runs in SIMULATION_RUN_OPTIONS if runs <= requested],
+                      default=SIMULATION_RUN_OPTIONS[0])
+
+    result = simulate_league(league_code, simulations=simulations, seed=SIMULATION_SEED)
+    if result is None:
+        return jsonify({
+            'success': False,
+            'error': 'No standings or fixtures in local cache'
+        }), 404
+    return jsonify({
+        'success': True,
+        'league_name': LEAGUE_NAMES.get(league_code, league_code),
+        **result
+    })
+
+@app.route('/api/export', methods=['GET', 'POST'])
+def api_export():
+    """API endpoint listing exported files; POST (with EXPORT_TOKEN) starts an incremental export"""
+    import export
+
+    if request.method == 'POST':
+        if not EXPORT_TOKEN:
+            return jsonify({
+                'success': False,
+                'error': 'Exports run with flask --app app export (EXPORT_TOKEN is not set)'
+            }), 403
+        if not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {EXPORT_TOKEN}'):
+            return jsonify({'success': False, 'error': 'Invalid export token'}), 401
+        file_format = (request.get_json(silent=True) or {}).get('format', 'parquet')
+        if file_format not in ('parquet', 'arrow'):
+            return jsonify({
+                'success': False,
+                'error': "Format must be 'parquet' or 'arrow'"
+            }), 400
+        if not claim_sync(EXPORT_STATE_KEY, lease_seconds=EXPORT_LEASE_SECONDS, daily=False):
+            return jsonify({'success': False, 'error': 'An export is already running'}), 409
+        # Runs outside the request so worker timeouts cannot cut a file in half.
+        threading.Thread(target=run_export_job, args=(file_format,), daemon=True).start()
+        return jsonify({'success': True, 'status': 'in_progress'}), 202
+
+    with get_db_connection() as conn:
+        job = conn.execute(
+            "SELECT last_status, last_error, updated_at FROM sync_state WHERE cache_key = ?",
+            (EXPORT_STATE_KEY,),
+        ).fetchone()
+    files = []
+    if os.path.isdir(EXPORT_DIR):
+        for root, _, names in os.walk(EXPORT_DIR):
+            for name in names:
+                if name.startswith('part-') and not name.endswith(export.TMP_SUFFIX):
+                    path = os.path.join(root, name)
+                    files.append({
+                        'path': os.path.relpath(path, EXPORT_DIR).replace(os.sep, '/'),
+                        'bytes': os.path.getsize(path)
+                    })
+    return jsonify({
+        'success': True,
+        'job': {
+            'status': job['last_status'],
+            'detail': job['last_error'],
+            'updated_at': job['updated_at']
+        } if job else None,
+        'state': export.read_state(EXPORT_DIR) if os.path.isdir(EXPORT_DIR) else {},
+        'files': sorted(files, key=lambda entry: entry['path'])
+    })
+
+@app.route('/exports/<path:filename>')
+def download_export(filename):
+    """Serve an exported Parquet/Arrow file"""
+    return send_from_directory(os.path.abspath(EXPORT_DIR), filename)
+
 @app.route('/api/match/<int:match_id>')
 def api_match_prediction(match_id):
     """API endpoint to get prediction for a specific match"""
-    # In a real implementation, we would fetch this specific match
-    # For now, we'll search through recent matches
-    matches = get_matches()
-    
-    match = next((m for m in matches if m.get('id') == match_id), None)
-    
+    match = resolve_matches([match_id]).get(match_id)
+
     if match:
-        prediction = generate_prediction(match)
+        with metrics.span('predict'):
+            prediction = generate_prediction(match)
         if prediction is None:
             return jsonify({
                 'success': False,
@@ -605,13 +1976,25 @@ def league_predictions(league_code):
     end_date = (datetime.now() + timedelta(days=14)).strftime('%Y-%m-%d')
     
     matches = get_matches(league_code, date_from=today, date_to=end_date)
-    predictions = [p for p in (generate_prediction(match) for match in matches) if p is not None]
+    with metrics.span('predict'):
+        predictions = [p for p in (generate_prediction(match) for match in matches) if p is not None]
+    season, standings = get_standings(league_code)
     
-    return render_template('league.html',
-                         predictions=predictions,
-                         league_code=league_code,
-                         league_name=LEAGUE_NAMES.get(league_code, league_code),
-                         leagues=LEAGUES)
+    with metrics.span('render'):
+        return render_template('league.html',
+                             predictions=predictions,
+                             standings=standings,
+                             season=season,
+                             league_code=league_code,
+                             league_name=LEAGUE_NAMES.get(league_code, league_code),
+                             leagues=LEAGUES)
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """Prometheus scrape endpoint (only available with ENABLE_METRICS=true)"""
+    if not metrics.enabled:
+        return "Metrics disabled", 404
+    return Response(metrics.render_prometheus(), mimetype='text/plain; version=0.0.4')
 
 if __name__ == '__main__':
     # WARNING: Debug mode should be disabled in production
@@ -619,4 +2002,5 @@ if __name__ == '__main__':
     debug_mode = os.environ.get('FLASK_DEBUG', 'False').lower() == 'true'
     # Bind to 127.0.0.1 for local development, 0.0.0.0 only for containers
     host = os.environ.get('FLASK_HOST', '127.0.0.1')
+    init_db()
     app.run(debug=debug_mode, host=host, port=5000)
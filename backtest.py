@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Backtest generate_prediction against finished matches in the SQLite cache.
+
+Every finished match is replayed as if it were still scheduled: the model only
+sees the fixture (teams, competition, kickoff) and, with the local-history
+model, results from before kickoff. Predicted goal expectations are turned
+into probabilities with independent Poisson distributions and scored with
+accuracy, log-loss and Brier score for the 1X2 result, over 2.5 goals and
+both teams to score, per league and season.
+
+Matches are streamed in chunks and each (league, season) group is scored in
+its own worker process, so memory stays bounded regardless of cache size.
+
+Usage:
+    python backtest.py
+    python backtest.py --model local_history --leagues PL PD --workers 4 --output backtest.json
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+# Add app to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import app
+from records import MatchRecord
+
+MODELS = ('baseline', 'local_history')
+MARKETS = ('result', 'over_2_5', 'btts')
+MAX_GOALS = 10
+EPSILON = 1e-15
+DEFAULT_CHUNK_SIZE = 2000
+
+
+def poisson_pmf(expected, max_goals=MAX_GOALS):
+    """Poisson probabilities for 0..max_goals goals (tail folded into the last bucket)."""
+    lam = max(expected, 0.05)
+    pmf = [math.exp(-lam)]
+    for goals in range(1, max_goals + 1):
+        pmf.append(pmf[-1] * lam / goals)
+    pmf[-1] += max(0.0, 1.0 - sum(pmf))
+    return pmf
+
+
+def market_probabilities(home_expected, away_expected):
+    """Return probabilities for every scored market from goal expectations."""
+    home_pmf = poisson_pmf(home_expected)
+    away_pmf = poisson_pmf(away_expected)
+    home_win = draw = away_win = over = 0.0
+    for home_goals, p_home in enumerate(home_pmf):
+        for away_goals, p_away in enumerate(away_pmf):
+            p = p_home * p_away
+            if home_goals > away_goals:
+                home_win += p
+            elif home_goals == away_goals:
+                draw += p
+            else:
+                away_win += p
+            if home_goals + away_goals > 2:
+                over += p
+    btts = (1 - home_pmf[0]) * (1 - away_pmf[0])
+    return {
+        'result': (home_win, draw, away_win),
+        'over_2_5': over,
+        'btts': btts,
+    }
+
+
+class ScoreCard:
+    """Running sums for accuracy, log-loss and Brier score of one market."""
+
+    def __init__(self):
+        self.count = 0
+        self.correct = 0
+        self.log_loss = 0.0
+        self.brier = 0.0
+
+    def add_categorical(self, probabilities, outcome_index):
+        self.count += 1
+        best = max(range(len(probabilities)), key=probabilities.__getitem__)
+        self.correct += best == outcome_index
+        self.log_loss -= math.log(max(probabilities[outcome_index], EPSILON))
+        self.brier += sum((p - (i == outcome_index)) ** 2 for i, p in enumerate(probabilities))
+
+    def add_binary(self, probability, happened):
+        self.add_categorical((1 - probability, probability), int(happened))
+
+    def merge(self, other):
+        self.count += other.count
+        self.correct += other.correct
+        self.log_loss += other.log_loss
+        self.brier += other.brier
+
+    def summary(self):
+        if not self.count:
+            return {'matches': 0, 'accuracy': None, 'log_loss': None, 'brier': None}
+        return {
+            'matches': self.count,
+            'accuracy': round(self.correct / self.count, 4),
+            'log_loss': round(self.log_loss / self.count, 4),
+            'brier': round(self.brier / self.count, 4),
+        }
+
+
+def _init_worker(db_path, model):
+    """Configure the app inside a worker process."""
+    app.SQLITE_DB_PATH = db_path
+    app.USE_SOCCERDATA = False  # FBref returns whole seasons: it would leak results
+    app.USE_LOCAL_HISTORY = model == 'local_history'
+
+
+def list_groups(leagues=None, seasons=None):
+    """Return the (league_code, season) pairs that have finished matches."""
+    with app.get_db_connection() as conn:
+        rows = conn.execute(
+            "SELECT DISTINCT league_code, season FROM standings_applied ORDER BY league_code, season"
+        ).fetchall()
+    return [
+        (row['league_code'], row['season']) for row in rows
+        if (not leagues or row['league_code'] in leagues) and (not seasons or row['season'] in seasons)
+    ]
+
+
+def score_group(group, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Replay and score every finished match of one (league, season) group."""
+    league_code, season = group
+    cards = {market: ScoreCard() for market in MARKETS}
+    with app.get_db_connection() as conn:
+        cursor = conn.execute(
+            """
+            SELECT m.match_id, m.utc_date, m.league_code, m.competition_name,
+                   m.home_team, m.home_team_id, m.away_team, m.away_team_id,
+                   a.score_home, a.score_away
+            FROM standings_applied a
+            JOIN matches m ON m.match_id = a.match_id
+            WHERE a.league_code = ? AND a.season = ?
+            ORDER BY a.utc_date
+            """,
+            (league_code, season),
+        )
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            for row in rows:
+                # Rebuilt from the fixture columns only: the stored result never reaches the model.
+                fixture = MatchRecord(
+                    row['match_id'], row['league_code'], row['competition_name'], row['utc_date'],
+                    'SCHEDULED', row['home_team'], row['home_team_id'], row['away_team'], row['away_team_id'],
+                )
+                prediction = app.generate_prediction(fixture)
+                if prediction is None:
+                    continue
+                expected = prediction['expected_goals']
+                probabilities = market_probabilities(expected['home'], expected['away'])
+                home_goals, away_goals = row['score_home'], row['score_away']
+                outcome = 0 if home_goals > away_goals else 1 if home_goals == away_goals else 2
+                cards['result'].add_categorical(probabilities['result'], outcome)
+                cards['over_2_5'].add_binary(probabilities['over_2_5'], home_goals + away_goals > 2)
+                cards['btts'].add_binary(probabilities['btts'], home_goals > 0 and away_goals > 0)
+    return group, cards
+
+
+def run_backtest(model='baseline', leagues=None, seasons=None, workers=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Score the model for every (league, season) group.
+
+    Returns:
+        Report dictionary with per-group and overall metrics for each market
+    """
+    if model not in MODELS:
+        raise ValueError(f"Unknown model: {model}")
+    groups = list_groups(leagues, seasons)
+    totals = {market: ScoreCard() for market in MARKETS}
+    report = {'model': model, 'groups': [], 'overall': {}}
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(app.SQLITE_DB_PATH, model)) as pool:
+        results = pool.map(score_group, groups, [chunk_size] * len(groups))
+        for (league_code, season), cards in results:
+            for market in MARKETS:
+                totals[market].merge(cards[market])
+            report['groups'].append({
+                'league_code': league_code,
+                'season': season,
+                **{market: cards[market].summary() for market in MARKETS},
+            })
+    report['overall'] = {market: totals[market].summary() for market in MARKETS}
+    return report
+
+
+def print_report(report):
+    """Pretty-print a backtest report."""
+    header = f"{'league':<8}{'season':<8}{'matches':>9}"
+    for market in MARKETS:
+        header += f"{market + ' acc':>16}{'logloss':>9}{'brier':>8}"
+    print(f"Model: {report['model']}")
+    print(header)
+    print('-' * len(header))
+    rows = [(g['league_code'], g['season'], g) for g in report['groups']]
+    rows.append(('ALL', '', report['overall']))
+    for league_code, season, metrics_by_market in rows:
+        line = f"{league_code:<8}{season:<8}{metrics_by_market['result']['matches']:>9}"
+        for market in MARKETS:
+            stats = metrics_by_market[market]
+            if stats['matches']:
+                line += f"{stats['accuracy']:>16.3f}{stats['log_loss']:>9.3f}{stats['brier']:>8.3f}"
+            else:
+                line += f"{'-':>16}{'-':>9}{'-':>8}"
+        print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Backtest Gambit predictions against cached results')
+    parser.add_argument('--model', choices=MODELS, default='baseline',
+                        help="'baseline' (default app model) or 'local_history' (USE_LOCAL_HISTORY)")
+    parser.add_argument('--leagues', nargs='+', help='League codes to include')
+    parser.add_argument('--seasons', nargs='+', help="Season start years to include, e.g. 2024")
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument('--output', help='Write the JSON report to this file')
+    args = parser.parse_args(argv)
+
+    app.init_db()
+    report = run_backtest(args.model, args.leagues, args.seasons, args.workers, args.chunk_size)
+    print_report(report)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks for the Gambit data and prediction path.
+
+Builds synthetic SQLite caches of increasing size and times the functions
+every request depends on. Runs fully offline: the app is pointed at a
+temporary database and no call reaches Football-Data.
+
+Usage:
+    python benchmark.py                                  # 1k and 100k matches
+    python benchmark.py --sizes 1000 100000 1000000      # include 1M matches
+    python benchmark.py --output current.json --baseline baseline.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+# Add app to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import app
+
+DEFAULT_SIZES = [1000, 100000]
+BUILD_CHUNK_SIZE = 50000
+UPSERT_BATCH_SIZE = 1000
+
+# Synthetic teams per league: (name, id)
+TEAMS_PER_LEAGUE = 20
+
+
+def synthetic_matches(count, start_id=1, span_days=None, seed_date=None):
+    """
+    Generate Football-Data style match payloads.
+
+    Matches are spread evenly across every league in LEAGUES and centred on
+    today, so the windows used by the routes always contain data.
+    """
+    seed_date = seed_date or datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    span_days = span_days or max(30, count // 100)
+    first_day = seed_date - timedelta(days=span_days // 2)
+    league_codes = list(app.LEAGUES)
+    for offset in range(count):
+        match_id = start_id + offset
+        league_index = match_id % len(league_codes)
+        league_code = league_codes[league_index]
+        home_index = match_id % TEAMS_PER_LEAGUE
+        away_index = (home_index + 1 + (match_id // TEAMS_PER_LEAGUE) % (TEAMS_PER_LEAGUE - 1)) % TEAMS_PER_LEAGUE
+        kickoff = first_day + timedelta(days=(offset * span_days) // count, hours=12 + match_id % 10)
+        finished = kickoff < seed_date
+        home_id = 1000 * (league_index + 1) + home_index
+        away_id = 1000 * (league_index + 1) + away_index
+        yield {
+            'id': match_id,
+            'utcDate': kickoff.strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'status': 'FINISHED' if finished else 'SCHEDULED',
+            'competition': {'code': league_code, 'name': app.LEAGUE_NAMES[league_code]},
+            'homeTeam': {'id': home_id, 'name': f'{league_code} Team {home_index}'},
+            'awayTeam': {'id': away_id, 'name': f'{league_code} Team {away_index}'},
+            'score': {
+                'fullTime': {
+                    'home': (match_id * 7) % 4 if finished else None,
+                    'away': (match_id * 3) % 3 if finished else None,
+                }
+            },
+        }
+
+
+def build_database(size):
+    """Fill the current SQLITE_DB_PATH with ``size`` synthetic matches."""
+    batch = []
+    for match in synthetic_matches(size):
+        batch.append(match)
+        if len(batch) >= BUILD_CHUNK_SIZE:
+            app.upsert_matches(batch)
+            batch = []
+    app.upsert_matches(batch)
+
+
+def timeit(func, repeat=5, number=1):
+    """Return timing statistics in milliseconds for ``func``."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - start) * 1000 / number)
+    return {
+        'min_ms': round(min(samples), 4),
+        'median_ms': round(statistics.median(samples), 4),
+        'max_ms': round(max(samples), 4),
+        'repeat': repeat,
+        'number': number,
+    }
+
+
+def memory(func):
+    """Return the memory (KiB) still referenced by ``func``'s result and its peak."""
+    tracemalloc.start()
+    try:
+        result = func()
+        retained, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    return {'retained_kb': retained // 1024, 'peak_kb': peak // 1024}
+
+
+def window(days):
+    """Return (date_from, date_to) strings for a window starting today."""
+    today = datetime.now()
+    return today.strftime('%Y-%m-%d'), (today + timedelta(days=days)).strftime('%Y-%m-%d')
+
+
+def run_size(size, repeat):
+    """Run every benchmark against a database holding ``size`` matches."""
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        app.SQLITE_DB_PATH = os.path.join(tmp_dir, f'bench-{size}.db')
+        app.init_db()
+
+        start = time.perf_counter()
+        build_database(size)
+        results['build_database'] = {'total_ms': round((time.perf_counter() - start) * 1000, 2)}
+
+        # Upsert: fresh inserts followed by updates of the same rows.
+        fresh = list(synthetic_matches(UPSERT_BATCH_SIZE, start_id=size + 1))
+        results[f'upsert_matches[insert x{UPSERT_BATCH_SIZE}]'] = timeit(
+            lambda: app.upsert_matches(fresh), repeat=1)
+        results[f'upsert_matches[update x{UPSERT_BATCH_SIZE}]'] = timeit(
+            lambda: app.upsert_matches(fresh), repeat=repeat)
+
+        # Typical route windows.
+        home_window = window(1)
+        search_window = window(7)
+        league_window = window(14)
+        wide_window = window(90)
+        results['get_matches_from_db[home 1d]'] = timeit(
+            lambda: app.get_matches_from_db(None, *home_window), repeat=repeat)
+        results['get_matches_from_db[all 7d]'] = timeit(
+            lambda: app.get_matches_from_db(None, *search_window), repeat=repeat)
+        results['get_matches_from_db[PL 14d]'] = timeit(
+            lambda: app.get_matches_from_db('PL', *league_window), repeat=repeat)
+        results['get_matches_from_db[all 90d]'] = timeit(
+            lambda: app.get_matches_from_db(None, *wide_window), repeat=repeat)
+        results['get_matches_from_db[all 90d] memory'] = memory(
+            lambda: app.get_matches_from_db(None, *wide_window))
+
+        # Full-text team search across every season in the cache.
+        results['search_matches[team]'] = timeit(
+            lambda: app.search_matches('PL Team 7'), repeat=repeat)
+
+        # Prediction per match and for a whole search window.
+        batch = app.get_matches_from_db(None, *search_window)
+        sample = batch[0] if batch else next(synthetic_matches(1))
+        results['generate_prediction[single]'] = timeit(
+            lambda: app.generate_prediction(sample), repeat=repeat, number=1000)
+        results[f'generate_prediction[batch x{len(batch)}]'] = timeit(
+            lambda: [app.generate_prediction(match) for match in batch], repeat=repeat)
+
+        # Sync bookkeeping.
+        cache_key = app.build_cache_key('PL', *league_window)
+        app.mark_sync_state(cache_key, 'success')
+        results['build_cache_key'] = timeit(
+            lambda: app.build_cache_key('PL', *league_window), repeat=repeat, number=10000)
+        results['should_sync_today'] = timeit(
+            lambda: app.should_sync_today(cache_key), repeat=repeat, number=100)
+    return results
+
+
+def compare(current, baseline, tolerance):
+    """Return human-readable regressions where median time or memory grew beyond tolerance."""
+    regressions = []
+    for size, benchmarks in current['results'].items():
+        for name, stats in benchmarks.items():
+            base = baseline.get('results', {}).get(size, {}).get(name)
+            if not base:
+                continue
+            for key, unit in (('median_ms', 'ms'), ('retained_kb', 'KiB')):
+                if key not in stats or key not in base:
+                    continue
+                if base[key] > 0 and stats[key] > base[key] * (1 + tolerance):
+                    ratio = stats[key] / base[key]
+                    regressions.append(
+                        f"{size} {name}: {base[key]:.3f}{unit} -> {stats[key]:.3f}{unit} ({ratio:.2f}x)")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Gambit micro-benchmarks')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help='Number of synthetic matches per database')
+    parser.add_argument('--repeat', type=int, default=5, help='Samples per benchmark')
+    parser.add_argument('--output', default='benchmark_results.json', help='Where to write results')
+    parser.add_argument('--baseline', help='Previous results file to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='Allowed median slowdown before reporting a regression (0.25 = 25%%)')
+    args = parser.parse_args(argv)
+
+    previous_db_path = app.SQLITE_DB_PATH
+    report = {
+        'created_at': datetime.utcnow().isoformat() + 'Z',
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': {},
+    }
+    try:
+        for size in args.sizes:
+            print(f"Benchmarking {size} matches...")
+            report['results'][str(size)] = run_size(size, args.repeat)
+            for name, stats in report['results'][str(size)].items():
+                if 'retained_kb' in stats:
+                    print(f"  {name:<45} {stats['retained_kb']:>12} KiB retained, {stats['peak_kb']} KiB peak")
+                    continue
+                value = stats.get('median_ms', stats.get('total_ms'))
+                print(f"  {name:<45} {value:>12.4f} ms")
+    finally:
+        app.SQLITE_DB_PATH = previous_db_path
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance)
+        if regressions:
+            print("Regressions against baseline:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print("No regressions against baseline")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,134 @@
+"""
+Cache backends for Gambit.
+
+``LocalCache`` keeps values in the current process (the historical default).
+``SQLiteCache`` stores JSON values in the shared ``gambit.db`` so every
+worker process of a multi-worker deployment sees the same entries.
+"""
+
+import json
+import threading
+import time
+
+
+class LocalCache:
+    """In-process cache with optional per-entry TTL and size cap (oldest entries evicted first)."""
+
+    def __init__(self, default_ttl=None, max_entries=None):
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._data = {}
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.time():
+                del self._data[key]
+                return default
+            return value
+
+    def set(self, key, value, ttl=None):
+        ttl = ttl if ttl is not None else self.default_ttl
+        expires_at = time.time() + ttl if ttl else None
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = (value, expires_at)
+            if self.max_entries is not None:
+                while len(self._data) > self.max_entries:
+                    del self._data[next(iter(self._data))]
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+
+class SQLiteCache:
+    """
+    Cache shared across processes through the ``cache_entries`` table.
+
+    Values must be JSON serializable. ``connect`` is a callable returning a
+    sqlite3 connection whose schema already contains ``cache_entries``.
+    With ``max_entries`` the namespace keeps only the most recently inserted
+    entries.
+    """
+
+    def __init__(self, connect, namespace, default_ttl=None, max_entries=None):
+        self.connect = connect
+        self.namespace = namespace
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+
+    def get(self, key, default=None):
+        with self.connect() as conn:
+            row = conn.execute(
+                "SELECT value, expires_at FROM cache_entries WHERE namespace = ? AND cache_key = ?",
+                (self.namespace, key),
+            ).fetchone()
+        if row is None:
+            return default
+        if row[1] is not None and row[1] <= time.time():
+            self.delete(key)
+            return default
+        return json.loads(row[0])
+
+    def set(self, key, value, ttl=None):
+        ttl = ttl if ttl is not None else self.default_ttl
+        expires_at = time.time() + ttl if ttl else None
+        with self.connect() as conn:
+            conn.execute(
+                """
+                INSERT INTO cache_entries (namespace, cache_key, value, expires_at)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(namespace, cache_key) DO UPDATE SET
+                    value=excluded.value,
+                    expires_at=excluded.expires_at
+                """,
+                (self.namespace, key, json.dumps(value), expires_at),
+            )
+            if self.max_entries is not None:
+                conn.execute(
+                    """
+                    DELETE FROM cache_entries
+                    WHERE namespace = ? AND rowid NOT IN (
+                        SELECT rowid FROM cache_entries WHERE namespace = ?
+                        ORDER BY rowid DESC LIMIT ?
+                    )
+                    """,
+                    (self.namespace, self.namespace, self.max_entries),
+                )
+
+    def delete(self, key):
+        with self.connect() as conn:
+            conn.execute(
+                "DELETE FROM cache_entries WHERE namespace = ? AND cache_key = ?",
+                (self.namespace, key),
+            )
+
+    def clear(self):
+        with self.connect() as conn:
+            conn.execute("DELETE FROM cache_entries WHERE namespace = ?", (self.namespace,))
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+
+def create_cache(backend, namespace, connect=None, default_ttl=None, max_entries=None):
+    """Build the cache selected by CACHE_BACKEND ('memory' or 'sqlite')."""
+    if backend == 'sqlite':
+        if connect is None:
+            raise ValueError("SQLiteCache requires a connection factory")
+        return SQLiteCache(connect, namespace, default_ttl, max_entries)
+    if backend == 'memory':
+        return LocalCache(default_ttl, max_entries)
+    raise ValueError(f"Unknown cache backend: {backend}")
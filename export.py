@@ -0,0 +1,285 @@
+"""
+Columnar export of cached matches and their predictions.
+
+Rows of the ``matches`` table are streamed in chunks, joined with the
+prediction computed for each match and written as Parquet (or Arrow IPC,
+which can be memory-mapped) files partitioned Hive-style by league and
+season::
+
+    exports/league_code=PL/season=2025/part-20250816T140000123456.parquet
+
+Each run only writes rows whose ``change_seq`` is above the watermark stored
+in ``_export_state.json``, as new part files. ``change_seq`` is assigned in
+commit order by ``upsert_matches``, so an upsert that commits while an export
+is reading can never land below the watermark (``updated_at`` is stamped
+before the commit and could). A match updated between two runs appears in
+several parts: readers keep the row with the highest ``change_seq`` per
+``match_id``.
+
+Part files are written under a ``.tmp`` name and renamed once complete; a
+failed run removes its parts and leaves the state untouched. A full run
+only deletes the previous parts once its own are complete, so a failure
+keeps the old dataset and watermark. Callers must
+make sure only one export runs per directory at a time (the app holds a
+lease in ``sync_state``); leftover ``.tmp`` files are then always stale and
+the next run deletes them.
+"""
+
+import json
+import os
+from datetime import datetime
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+STATE_FILE = '_export_state.json'
+TMP_SUFFIX = '.tmp'
+DEFAULT_CHUNK_SIZE = 5000
+FORMATS = {'parquet': '.parquet', 'arrow': '.arrow'}
+
+# Partition columns (league_code, season) live in the directory names.
+SCHEMA = pa.schema([
+    ('match_id', pa.int64()),
+    ('competition_name', pa.string()),
+    ('utc_date', pa.timestamp('s', tz='UTC')),
+    ('status', pa.string()),
+    ('home_team', pa.string()),
+    ('home_team_id', pa.int64()),
+    ('away_team', pa.string()),
+    ('away_team_id', pa.int64()),
+    ('score_home', pa.int32()),
+    ('score_away', pa.int32()),
+    ('updated_at', pa.timestamp('us', tz='UTC')),
+    ('change_seq', pa.int64()),
+    ('predicted_home_goals', pa.int32()),
+    ('predicted_away_goals', pa.int32()),
+    ('expected_home_goals', pa.float64()),
+    ('expected_away_goals', pa.float64()),
+    ('predicted_result', pa.string()),
+    ('confidence', pa.float64()),
+    ('predicted_over_2_5', pa.bool_()),
+    ('predicted_btts', pa.bool_()),
+    ('prediction_source', pa.string()),
+])
+
+EXPORT_SQL = """
+    SELECT match_id, league_code, competition_name, utc_date, status,
+           home_team, home_team_id, away_team, away_team_id,
+           score_home, score_away, raw_json, updated_at, change_seq
+    FROM matches
+    {where}
+    ORDER BY league_code, utc_date, match_id
+"""
+
+
+def read_state(output_dir):
+    """Return the saved export state ({} before the first export)."""
+    path = os.path.join(output_dir, STATE_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def write_state(output_dir, state):
+    """Atomically replace the export state file."""
+    path = os.path.join(output_dir, STATE_FILE)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _prediction_columns(prediction):
+    """Flatten one generate_prediction result into export columns."""
+    if prediction is None:
+        return (None,) * 9
+    home_goals, away_goals = (int(goals) for goals in prediction['predicted_score'].split('-'))
+    goals = prediction['goals_prediction']
+    return (
+        home_goals,
+        away_goals,
+        prediction['expected_goals']['home'],
+        prediction['expected_goals']['away'],
+        prediction['predicted_result'],
+        int(prediction['confidence'].rstrip('%')) / 100,
+        goals['over_2_5'],
+        goals['both_teams_score'],
+        prediction['data_source'],
+    )
+
+
+def _record_batch(rows):
+    """Build an Arrow record batch from (row, prediction columns) pairs."""
+    columns = [[] for _ in SCHEMA]
+    for row, predicted in rows:
+        values = (
+            row['match_id'], row['competition_name'], row['utc_date'], row['status'],
+            row['home_team'], row['home_team_id'], row['away_team'], row['away_team_id'],
+            row['score_home'], row['score_away'], row['updated_at'], row['change_seq'], *predicted,
+        )
+        for column, value in zip(columns, values):
+            column.append(value)
+    arrays = []
+    for field, values in zip(SCHEMA, columns):
+        if pa.types.is_timestamp(field.type):
+            arrays.append(pa.array(values, pa.string()).cast(field.type))
+        else:
+            arrays.append(pa.array(values, field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=SCHEMA)
+
+
+class _PartitionWriter:
+    """Lazily opened writer for one league/season partition."""
+
+    def __init__(self, output_dir, league_code, season, file_format, run_id):
+        self.relative_path = os.path.join(
+            f'league_code={league_code}', f'season={season}', f'part-{run_id}{FORMATS[file_format]}')
+        self.path = os.path.join(output_dir, self.relative_path)
+        self.tmp_path = self.path + TMP_SUFFIX
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        if file_format == 'parquet':
+            self.writer = pq.ParquetWriter(self.tmp_path, SCHEMA, compression='zstd')
+        else:
+            self.writer = pa.ipc.new_file(self.tmp_path, SCHEMA)
+
+    def write(self, batch):
+        self.writer.write_batch(batch)
+
+    def close(self):
+        """Finish the file and publish it under its final name."""
+        self.writer.close()
+        os.replace(self.tmp_path, self.path)
+
+    def abort(self):
+        """Drop the unfinished file."""
+        try:
+            self.writer.close()
+        except Exception:
+            pass
+        os.remove(self.tmp_path)
+
+
+def published_parts(output_dir):
+    """Return the paths of every finished part file under ``output_dir``."""
+    return [
+        os.path.join(root, name)
+        for root, _, names in os.walk(output_dir)
+        for name in names
+        if name.startswith('part-') and not name.endswith(TMP_SUFFIX)
+    ]
+
+
+def _replace_dataset(output_dir, old_parts):
+    """Drop the parts a successful full run superseded, then empty partition directories."""
+    # Without a state file a crash here leads to a full export, never to a gap.
+    state_path = os.path.join(output_dir, STATE_FILE)
+    if os.path.exists(state_path):
+        os.remove(state_path)
+    for path in old_parts:
+        os.remove(path)
+    for root, _, _ in sorted(os.walk(output_dir), key=lambda entry: len(entry[0]), reverse=True):
+        if root != output_dir and not os.listdir(root):
+            os.rmdir(root)
+
+
+def remove_stale_parts(output_dir):
+    """Delete ``.tmp`` part files left behind by an interrupted export."""
+    for root, _, names in os.walk(output_dir):
+        for name in names:
+            if name.startswith('part-') and name.endswith(TMP_SUFFIX):
+                os.remove(os.path.join(root, name))
+
+
+def export_matches(connect, output_dir, predict, season_of, full=False, file_format='parquet',
+                   chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Export matches changed since the last run as partitioned columnar files.
+
+    Args:
+        connect: Callable returning a sqlite3 connection with ``sqlite3.Row`` rows
+        output_dir: Root directory of the partitioned dataset
+        predict: ``predict(match)`` returning a prediction dict or None
+        season_of: ``season_of(match)`` returning the season label
+        full: Drop previous exports and export every row (forced when the
+            state predates ``change_seq`` watermarks)
+        file_format: 'parquet' or 'arrow' (uncompressed IPC, memory-mappable)
+        chunk_size: Rows read from SQLite and written per batch
+
+    Returns:
+        Summary with exported row count, written files and the new watermark
+    """
+    if file_format not in FORMATS:
+        raise ValueError(f"Unknown export format: {file_format}")
+    os.makedirs(output_dir, exist_ok=True)
+    if isinstance(read_state(output_dir).get('watermark'), str):
+        full = True  # updated_at watermark from an older export: parts lack change_seq
+    remove_stale_parts(output_dir)
+    # A full run replaces these only once its own parts are complete.
+    old_parts = published_parts(output_dir) if full else []
+    state = {} if full else read_state(output_dir)
+    since = state.get('watermark')
+    run_id = datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')
+
+    where, params = ('WHERE change_seq > ?', (since,)) if since is not None else ('', ())
+    writers = {}
+    pending = {}
+    files = []
+    watermark = since
+    total = 0
+
+    def flush(close=False):
+        for key, partition_rows in pending.items():
+            if key not in writers:
+                writers[key] = _PartitionWriter(output_dir, *key, file_format, run_id)
+            writers[key].write(_record_batch(partition_rows))
+        pending.clear()
+        if close:
+            for writer in writers.values():
+                writer.close()
+                files.append(writer.relative_path)
+            writers.clear()
+
+    try:
+        with connect() as conn:
+            cursor = conn.execute(EXPORT_SQL.format(where=where), params)
+            current_league = None
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                for row in rows:
+                    league_code = row['league_code'] or 'NONE'
+                    if league_code != current_league:
+                        # Rows arrive league by league: finished leagues release their files.
+                        flush(close=True)
+                        current_league = league_code
+                    match = json.loads(row['raw_json'])
+                    key = (league_code, season_of(match) or 'NONE')
+                    pending.setdefault(key, []).append((row, _prediction_columns(predict(match))))
+                    if watermark is None or row['change_seq'] > watermark:
+                        watermark = row['change_seq']
+                flush()
+                total += len(rows)
+            flush(close=True)
+    except BaseException:
+        # The state is not advanced, so the next run exports these rows again.
+        for writer in writers.values():
+            writer.abort()
+        for relative_path in files:
+            os.remove(os.path.join(output_dir, relative_path))
+        raise
+
+    if full:
+        _replace_dataset(output_dir, old_parts)
+    write_state(output_dir, {
+        'watermark': watermark,
+        'exported_at': datetime.utcnow().isoformat() + 'Z',
+        'format': file_format,
+    })
+    return {
+        'rows': total,
+        'files': sorted(files),
+        'since': since,
+        'watermark': watermark,
+    }
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Concurrent load-test harness for the Gambit web app.
+
+Drives ``/``, ``/leagues/<code>``, ``/api/predictions`` and
+``/api/match/<id>`` from a pool of worker threads and reports throughput and
+latency percentiles per route. Pair it with ``replay_server.py`` to run
+without touching the real Football-Data API:
+
+    python replay_server.py serve --port 8081 --latency-ms 100 &
+    FOOTBALL_DATA_BASE_URL=http://127.0.0.1:8081/v4 python app.py &
+    python loadtest.py --base-url http://127.0.0.1:5000 --concurrency 16 --duration 30
+"""
+
+import argparse
+import itertools
+import json
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+DEFAULT_LEAGUES = ['PL', 'PD', 'BL1', 'SA', 'CL']
+PERCENTILES = (50, 90, 95, 99)
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+
+def discover_match_ids(base_url, limit=50, timeout=30):
+    """Collect match ids from /api/predictions so /api/match/<id> hits real rows."""
+    try:
+        response = requests.get(f'{base_url}/api/predictions', timeout=timeout)
+        predictions = response.json().get('predictions', [])
+    except (requests.exceptions.RequestException, ValueError):
+        return []
+    return [p['match_id'] for p in predictions[:limit] if p.get('match_id') is not None]
+
+
+def build_paths(leagues, match_ids):
+    """Return the weighted list of paths each worker cycles through."""
+    paths = ['/', '/api/predictions']
+    paths.extend(f'/leagues/{code}' for code in leagues)
+    paths.extend(f'/api/match/{match_id}' for match_id in match_ids[:10])
+    return paths
+
+
+def route_name(path):
+    """Group concrete paths under their route template."""
+    if path.startswith('/leagues/'):
+        return '/leagues/<code>'
+    if path.startswith('/api/match/'):
+        return '/api/match/<id>'
+    return path
+
+
+class LoadResult:
+    """Thread-safe accumulator of latencies and status codes per route."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = {}
+        self.statuses = {}
+
+    def add(self, route, seconds, status):
+        with self.lock:
+            self.latencies.setdefault(route, []).append(seconds * 1000)
+            route_statuses = self.statuses.setdefault(route, {})
+            route_statuses[status] = route_statuses.get(status, 0) + 1
+
+    def summary(self, elapsed):
+        """Return throughput and latency percentiles per route and overall."""
+        report = {'elapsed_s': round(elapsed, 3), 'routes': {}}
+        everything = []
+        for route, values in sorted(self.latencies.items()):
+            values = sorted(values)
+            everything.extend(values)
+            report['routes'][route] = self._stats(values, elapsed, self.statuses[route])
+        statuses = {}
+        for route_statuses in self.statuses.values():
+            for status, count in route_statuses.items():
+                statuses[status] = statuses.get(status, 0) + count
+        report['overall'] = self._stats(sorted(everything), elapsed, statuses)
+        return report
+
+    @staticmethod
+    def _stats(values, elapsed, statuses):
+        stats = {
+            'requests': len(values),
+            'throughput_rps': round(len(values) / elapsed, 2) if elapsed else 0.0,
+            'mean_ms': round(sum(values) / len(values), 2) if values else 0.0,
+            'max_ms': round(values[-1], 2) if values else 0.0,
+            'status_codes': {str(k): v for k, v in sorted(statuses.items(), key=lambda item: str(item[0]))},
+        }
+        for pct in PERCENTILES:
+            stats[f'p{pct}_ms'] = round(percentile(values, pct), 2)
+        return stats
+
+
+def run_load(base_url, paths, concurrency, duration=None, total_requests=None, timeout=30):
+    """Hit ``paths`` from ``concurrency`` threads until duration or request budget ends."""
+    result = LoadResult()
+    counter = itertools.count()
+    deadline = time.perf_counter() + duration if duration else None
+
+    def worker(worker_id):
+        session = requests.Session()
+        cycle = itertools.cycle(paths[worker_id % len(paths):] + paths[:worker_id % len(paths)])
+        while True:
+            if deadline is not None and time.perf_counter() >= deadline:
+                return
+            if total_requests is not None and next(counter) >= total_requests:
+                return
+            path = next(cycle)
+            start = time.perf_counter()
+            try:
+                status = session.get(f'{base_url}{path}', timeout=timeout).status_code
+            except requests.exceptions.RequestException as e:
+                status = type(e).__name__
+            result.add(route_name(path), time.perf_counter() - start, status)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for future in [pool.submit(worker, i) for i in range(concurrency)]:
+            future.result()
+    return result.summary(time.perf_counter() - started)
+
+
+def print_report(report):
+    """Pretty-print a load test summary."""
+    header = f"{'route':<20}{'reqs':>8}{'rps':>10}" + ''.join(f"{'p' + str(p):>10}" for p in PERCENTILES)
+    print(header)
+    print('-' * len(header))
+    rows = list(report['routes'].items()) + [('TOTAL', report['overall'])]
+    for route, stats in rows:
+        line = f"{route:<20}{stats['requests']:>8}{stats['throughput_rps']:>10.1f}"
+        line += ''.join(f"{stats[f'p{p}_ms']:>10.1f}" for p in PERCENTILES)
+        print(line)
+    print(f"\nStatus codes: {report['overall']['status_codes']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Gambit load-test harness')
+    parser.add_argument('--base-url', default='http://127.0.0.1:5000')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=None, help='Seconds to run')
+    parser.add_argument('--requests', type=int, default=None, help='Total request budget')
+    parser.add_argument('--leagues', nargs='+', default=DEFAULT_LEAGUES)
+    parser.add_argument('--timeout', type=float, default=30)
+    parser.add_argument('--output', help='Write the JSON report to this file')
+    args = parser.parse_args(argv)
+
+    if args.duration is None and args.requests is None:
+        args.duration = 10.0
+
+    base_url = args.base_url.rstrip('/')
+    match_ids = discover_match_ids(base_url, timeout=args.timeout)
+    paths = build_paths(args.leagues, match_ids)
+    print(f"Load testing {base_url} with {args.concurrency} workers over {len(paths)} paths")
+    report = run_load(base_url, paths, args.concurrency, args.duration, args.requests, args.timeout)
+    print_report(report)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,262 @@
+"""
+Lightweight request instrumentation for Gambit.
+
+Collects per-request timing spans (exposed through the ``Server-Timing``
+header) and process-wide counters rendered in the Prometheus text format.
+When disabled every call returns immediately so the hot path pays only an
+attribute lookup.
+
+Values live in the process that recorded them. Under pre-forked servers each
+worker can also publish a snapshot of its totals to a shared directory (one
+JSON file per worker, replaced atomically, like Prometheus' multiprocess
+mode); ``render_prometheus`` then sums every snapshot, so any worker answers
+a scrape for the whole server.
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import nullcontext
+
+from flask import g, has_request_context
+
+# Spans reported by the application, in the order they appear in headers.
+SPAN_NAMES = ('db_read', 'sync', 'api_fetch', 'predict', 'simulate', 'render')
+
+# Counter names and their Prometheus help text.
+COUNTERS = {
+    'api_calls': 'Requests sent to the Football Data API',
+    'api_rate_limited': 'Football Data API responses with status 429',
+    'cache_hits': 'Lookups served from a local cache without an upstream call',
+    'rows_upserted': 'Match rows written to the SQLite cache',
+    'source_hedges': 'Second upstream attempts fired by hedging or fast retry',
+    'source_failures': 'Upstream provider calls that failed or missed their deadline',
+    'source_circuit_open': 'Upstream provider calls skipped because the circuit was open',
+    'source_throttled': 'Upstream calls skipped by a local rate limit',
+    'source_busy': 'Upstream calls skipped because every local slot of the provider stayed busy',
+}
+
+_NULL_SPAN = nullcontext()
+
+
+class _Span:
+    """Context manager that adds its elapsed time to the owning registry."""
+
+    __slots__ = ('registry', 'name', 'start')
+
+    def __init__(self, registry, name):
+        self.registry = registry
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.registry.observe(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class Metrics:
+    """Thread-safe registry of timing spans and counters."""
+
+    def __init__(self, enabled=False, namespace='gambit', shared_dir=None):
+        self.enabled = enabled
+        self.namespace = namespace
+        self.shared_dir = shared_dir
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._snapshot_name = None
+        self.reset()
+        if shared_dir:
+            os.makedirs(shared_dir, exist_ok=True)
+            self._new_snapshot_name()
+            if hasattr(os, 'register_at_fork'):
+                os.register_at_fork(after_in_child=self._after_fork)
+
+    def _new_snapshot_name(self):
+        # pid alone could be reused by a later worker and overwrite a dead one's totals.
+        self._snapshot_name = f'worker-{os.getpid()}-{uuid.uuid4().hex[:8]}.json'
+
+    def _after_fork(self):
+        """Start a forked worker from zero: inherited values belong to the parent's snapshot."""
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self.reset()
+        self._new_snapshot_name()
+
+    def reset(self):
+        """Drop every collected value (useful for tests and benchmarks)."""
+        with self._lock:
+            self._counters = {}
+            self._span_seconds = {}
+            self._span_count = {}
+            self._requests = {}
+            self._request_seconds = {}
+
+    def clear_shared(self):
+        """Delete every worker snapshot (call once before forking, on server start)."""
+        if not self.shared_dir:
+            return
+        for name in os.listdir(self.shared_dir):
+            if name.startswith('worker-'):
+                os.remove(os.path.join(self.shared_dir, name))
+
+    def _values(self):
+        """Copy the values recorded by this process."""
+        with self._lock:
+            return (dict(self._counters), dict(self._span_seconds), dict(self._span_count),
+                    dict(self._requests), dict(self._request_seconds))
+
+    def flush(self):
+        """Publish this process's totals to the shared directory (no-op without one)."""
+        if not self.shared_dir or not self.enabled:
+            return
+        # One writer at a time, so an older snapshot never replaces a newer one.
+        with self._flush_lock:
+            counters, span_seconds, span_count, requests_total, request_seconds = self._values()
+            snapshot = {
+                'counters': [[name, labels, value] for (name, labels), value in counters.items()],
+                'span_seconds': span_seconds,
+                'span_count': span_count,
+                'requests': [[endpoint, status, value] for (endpoint, status), value in requests_total.items()],
+                'request_seconds': request_seconds,
+            }
+            path = os.path.join(self.shared_dir, self._snapshot_name)
+            with open(path + '.tmp', 'w') as f:
+                json.dump(snapshot, f)
+            os.replace(path + '.tmp', path)
+
+    def _shared_values(self):
+        """Sum the snapshots of every worker, this one included."""
+        self.flush()
+        counters, span_seconds, span_count, requests_total, request_seconds = {}, {}, {}, {}, {}
+        for name in os.listdir(self.shared_dir):
+            if not (name.startswith('worker-') and name.endswith('.json')):
+                continue
+            try:
+                with open(os.path.join(self.shared_dir, name)) as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError):
+                continue  # removed by a restart while listing
+            for counter, labels, value in snapshot['counters']:
+                key = (counter, tuple(tuple(pair) for pair in labels))
+                counters[key] = counters.get(key, 0) + value
+            for span, seconds in snapshot['span_seconds'].items():
+                span_seconds[span] = span_seconds.get(span, 0.0) + seconds
+            for span, count in snapshot['span_count'].items():
+                span_count[span] = span_count.get(span, 0) + count
+            for endpoint, status, value in snapshot['requests']:
+                requests_total[(endpoint, status)] = requests_total.get((endpoint, status), 0) + value
+            for endpoint, seconds in snapshot['request_seconds'].items():
+                request_seconds[endpoint] = request_seconds.get(endpoint, 0.0) + seconds
+        return counters, span_seconds, span_count, requests_total, request_seconds
+
+    def span(self, name):
+        """Return a context manager timing ``name`` for the current request."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name)
+
+    def observe(self, name, seconds):
+        """Record a finished span both globally and on the active request."""
+        with self._lock:
+            self._span_seconds[name] = self._span_seconds.get(name, 0.0) + seconds
+            self._span_count[name] = self._span_count.get(name, 0) + 1
+        if has_request_context():
+            timings = g.setdefault('_timings', {})
+            timings[name] = timings.get(name, 0.0) + seconds
+        elif self.shared_dir:
+            self.flush()  # background job: no request end to publish it
+
+    def incr(self, name, value=1, **labels):
+        """Increase counter ``name`` by ``value`` with optional labels."""
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+        if self.shared_dir and not has_request_context():
+            self.flush()  # background job: no request end to publish it
+
+    def counter_value(self, name, **labels):
+        """Return the current value of a counter (0 when never incremented)."""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            return self._counters.get(key, 0)
+
+    def start_request(self):
+        """Mark the beginning of a request handled by Flask."""
+        if self.enabled:
+            g._request_started = time.perf_counter()
+
+    def finish_request(self, response, endpoint):
+        """Attach the ``Server-Timing`` header and record request totals."""
+        if not self.enabled or '_request_started' not in g:
+            return response
+        elapsed = time.perf_counter() - g._request_started
+        timings = g.get('_timings', {})
+
+        entries = [f'{name};dur={timings[name] * 1000:.2f}' for name in SPAN_NAMES if name in timings]
+        entries.extend(
+            f'{name};dur={seconds * 1000:.2f}' for name, seconds in timings.items() if name not in SPAN_NAMES
+        )
+        entries.append(f'total;dur={elapsed * 1000:.2f}')
+        response.headers['Server-Timing'] = ', '.join(entries)
+
+        key = (endpoint or 'unknown', str(response.status_code))
+        with self._lock:
+            self._requests[key] = self._requests.get(key, 0) + 1
+            self._request_seconds[key[0]] = self._request_seconds.get(key[0], 0.0) + elapsed
+        self.flush()
+        return response
+
+    def render_prometheus(self):
+        """Render all collected values (of every worker, with a shared directory) as Prometheus text."""
+        ns = self.namespace
+        lines = []
+        if self.shared_dir:
+            counters, span_seconds, span_count, requests_total, request_seconds = self._shared_values()
+        else:
+            counters, span_seconds, span_count, requests_total, request_seconds = self._values()
+
+        for name, help_text in COUNTERS.items():
+            metric = f'{ns}_{name}_total'
+            lines.append(f'# HELP {metric} {help_text}')
+            lines.append(f'# TYPE {metric} counter')
+            samples = sorted((labels, value) for (key, labels), value in counters.items() if key == name)
+            if not samples:
+                lines.append(f'{metric} 0')
+            for labels, value in samples:
+                lines.append(f'{metric}{_format_labels(labels)} {value}')
+
+        lines.append(f'# HELP {ns}_span_seconds_total Time spent inside each instrumented span')
+        lines.append(f'# TYPE {ns}_span_seconds_total counter')
+        for name in sorted(span_seconds):
+            lines.append(f'{ns}_span_seconds_total{{span="{name}"}} {span_seconds[name]:.6f}')
+        lines.append(f'# HELP {ns}_span_count_total Number of completed spans')
+        lines.append(f'# TYPE {ns}_span_count_total counter')
+        for name in sorted(span_count):
+            lines.append(f'{ns}_span_count_total{{span="{name}"}} {span_count[name]}')
+
+        lines.append(f'# HELP {ns}_http_requests_total HTTP requests handled by endpoint and status')
+        lines.append(f'# TYPE {ns}_http_requests_total counter')
+        for (endpoint, status), value in sorted(requests_total.items()):
+            lines.append(f'{ns}_http_requests_total{{endpoint="{endpoint}",status="{status}"}} {value}')
+        lines.append(f'# HELP {ns}_http_request_seconds_total Wall time spent handling requests by endpoint')
+        lines.append(f'# TYPE {ns}_http_request_seconds_total counter')
+        for endpoint, seconds in sorted(request_seconds.items()):
+            lines.append(f'{ns}_http_request_seconds_total{{endpoint="{endpoint}"}} {seconds:.6f}')
+
+        return '\n'.join(lines) + '\n'
+
+
+def _format_labels(labels):
+    """Format a sorted tuple of label pairs as ``{a="1",b="2"}``."""
+    if not labels:
+        return ''
+    inner = ','.join(f'{key}="{value}"' for key, value in labels)
+    return '{' + inner + '}'
@@ -0,0 +1,84 @@
+"""
+Compact match records for the request hot path.
+
+``MatchRecord`` holds the normalized columns of the ``matches`` table in
+slots and keeps the original Football-Data payload as the undecoded
+``raw_json`` string. Prediction and API code read the attributes directly;
+the nested dict is only decoded when something asks for a field that has no
+column (``record['season']``, ``record.get('score')``...).
+"""
+
+import json
+
+# Column order expected by MatchRecord(*row).
+MATCH_COLUMNS = (
+    'match_id', 'league_code', 'competition_name', 'utc_date', 'status',
+    'home_team', 'home_team_id', 'away_team', 'away_team_id',
+    'score_home', 'score_away', 'raw_json',
+)
+MATCH_COLUMNS_SQL = ', '.join(MATCH_COLUMNS)
+
+
+class MatchRecord:
+    """One match, built from SQLite columns or from a Football-Data dict."""
+
+    __slots__ = (
+        'id', 'league_code', 'competition_name', 'utc_date', 'status',
+        'home_team', 'home_team_id', 'away_team', 'away_team_id',
+        'score_home', 'score_away', 'raw_json', '_raw',
+    )
+
+    def __init__(self, id, league_code, competition_name, utc_date, status,
+                 home_team, home_team_id, away_team, away_team_id,
+                 score_home=None, score_away=None, raw_json=None):
+        self.id = id
+        self.league_code = league_code
+        self.competition_name = competition_name
+        self.utc_date = utc_date
+        self.status = status
+        self.home_team = home_team
+        self.home_team_id = home_team_id
+        self.away_team = away_team
+        self.away_team_id = away_team_id
+        self.score_home = score_home
+        self.score_away = score_away
+        self.raw_json = raw_json
+        self._raw = None
+
+    @classmethod
+    def from_dict(cls, match):
+        """Wrap a Football-Data match dict (already decoded, kept as ``raw``)."""
+        competition = match.get('competition') or {}
+        home = match.get('homeTeam') or {}
+        away = match.get('awayTeam') or {}
+        full_time = (match.get('score') or {}).get('fullTime') or {}
+        record = cls(
+            match.get('id'), competition.get('code'), competition.get('name'),
+            match.get('utcDate'), match.get('status'),
+            home.get('name'), home.get('id'), away.get('name'), away.get('id'),
+            full_time.get('home'), full_time.get('away'),
+        )
+        record._raw = match
+        return record
+
+    @property
+    def raw(self):
+        """The full Football-Data payload, decoded on first use."""
+        if self._raw is None:
+            self._raw = json.loads(self.raw_json) if self.raw_json else {}
+        return self._raw
+
+    # Mapping access for code that still expects the Football-Data dict.
+    def __getitem__(self, key):
+        return self.raw[key]
+
+    def get(self, key, default=None):
+        return self.raw.get(key, default)
+
+    def __repr__(self):
+        return f'MatchRecord(id={self.id!r}, {self.home_team!r} vs {self.away_team!r}, {self.utc_date!r})'
+
+
+def as_record(match):
+    """Return ``match`` as a MatchRecord (dicts from upstream are wrapped)."""
+    return match if isinstance(match, MatchRecord) else MatchRecord.from_dict(match)
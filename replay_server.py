@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Offline stand-in for the Football-Data.org v4 API.
+
+Replays recorded ``/v4/matches`` and ``/v4/competitions/<id>/matches``
+responses (or synthetic fixtures when nothing was recorded) with configurable
+latency, 429 injection and error rates. Point the app at it through
+``FOOTBALL_DATA_BASE_URL``:
+
+    python replay_server.py serve --port 8081 --latency-ms 120 --rate-429 0.05
+    FOOTBALL_DATA_BASE_URL=http://127.0.0.1:8081/v4 python app.py
+
+Record real responses once (requires FOOTBALL_DATA_API_KEY):
+
+    python replay_server.py record --output recordings/
+"""
+
+import argparse
+import glob
+import json
+import os
+import random
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+from flask import Flask, jsonify, request
+from werkzeug.serving import make_server
+
+# Add app to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import app as gambit
+from benchmark import synthetic_matches
+
+DEFAULT_SYNTHETIC_SIZE = 2000
+
+
+def load_recordings(recordings_dir):
+    """Load every recorded Football-Data response in ``recordings_dir``."""
+    matches = {}
+    for path in sorted(glob.glob(os.path.join(recordings_dir, '*.json'))):
+        with open(path) as f:
+            payload = json.load(f)
+        for match in payload.get('matches', []):
+            matches[match.get('id')] = match
+    return list(matches.values())
+
+
+def competition_codes(competition):
+    """Return the league codes a ``/competitions/<id>`` path segment refers to."""
+    codes = {code for code, value in gambit.LEAGUES.items() if str(value) == competition}
+    codes.add(competition)
+    return codes
+
+
+def in_window(match, date_from, date_to):
+    """Check whether a match kicks off inside the inclusive date window."""
+    day = (match.get('utcDate') or '')[:10]
+    if date_from and day < date_from:
+        return False
+    if date_to and day > date_to:
+        return False
+    return True
+
+
+def create_replay_app(matches, latency_ms=0, jitter_ms=0, rate_429=0.0, error_rate=0.0, seed=None):
+    """
+    Build the Flask app serving the replayed API.
+
+    Args:
+        matches: Football-Data match payloads to serve
+        latency_ms: Fixed delay added to every response
+        jitter_ms: Extra uniformly distributed delay (0..jitter_ms)
+        rate_429: Fraction of requests answered with 429 Too Many Requests
+        error_rate: Fraction of requests answered with 500 Internal Server Error
+        seed: Seed for reproducible fault injection
+    """
+    replay = Flask(__name__)
+    rng = random.Random(seed)
+    rng_lock = threading.Lock()
+    stats = {'requests': 0, 'rate_limited': 0, 'errors': 0}
+    replay.config['REPLAY_STATS'] = stats
+
+    def respond(selected):
+        with rng_lock:
+            stats['requests'] += 1
+            delay = latency_ms + (rng.uniform(0, jitter_ms) if jitter_ms else 0)
+            roll = rng.random()
+            if roll < rate_429:
+                stats['rate_limited'] += 1
+            elif roll < rate_429 + error_rate:
+                stats['errors'] += 1
+        if delay:
+            time.sleep(delay / 1000)
+        if roll < rate_429:
+            return jsonify({
+                'message': 'You reached your request limit. Wait 60 seconds.',
+                'errorCode': 429
+            }), 429
+        if roll < rate_429 + error_rate:
+            return jsonify({'message': 'Injected upstream failure', 'errorCode': 500}), 500
+
+        date_from = request.args.get('dateFrom')
+        date_to = request.args.get('dateTo')
+        ids = request.args.get('ids')
+        result = [m for m in selected if in_window(m, date_from, date_to)]
+        if ids:
+            wanted = {int(value) for value in ids.split(',') if value.strip().isdigit()}
+            result = [m for m in result if m.get('id') in wanted]
+        return jsonify({
+            'filters': {k: v for k, v in (('dateFrom', date_from), ('dateTo', date_to), ('ids', ids)) if v},
+            'resultSet': {'count': len(result)},
+            'matches': result
+        })
+
+    @replay.route('/v4/matches')
+    def all_matches():
+        return respond(matches)
+
+    @replay.route('/v4/competitions/<competition>/matches')
+    def competition_matches(competition):
+        codes = competition_codes(competition)
+        return respond([
+            m for m in matches
+            if m.get('competition', {}).get('code') in codes
+            or str(m.get('competition', {}).get('id')) == competition
+        ])
+
+    @replay.route('/v4/_stats')
+    def replay_stats():
+        return jsonify(stats)
+
+    return replay
+
+
+class ReplayServer:
+    """Run a replay app on a background thread (used by tests and load tests)."""
+
+    def __init__(self, replay_app, host='127.0.0.1', port=0):
+        self.server = make_server(host, port, replay_app, threaded=True)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        return f'http://{self.server.host}:{self.server.port}/v4'
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.server.shutdown()
+        self.thread.join()
+        return False
+
+
+def record(output_dir, days_back=7, days_ahead=14):
+    """Save real Football-Data responses for every league into ``output_dir``."""
+    os.makedirs(output_dir, exist_ok=True)
+    today = datetime.now()
+    date_from = (today - timedelta(days=days_back)).strftime('%Y-%m-%d')
+    date_to = (today + timedelta(days=days_ahead)).strftime('%Y-%m-%d')
+    targets = [('matches', None)] + [(f'competition_{code}', code) for code in gambit.LEAGUES]
+    for name, league_code in targets:
+        matches = gambit.fetch_matches_from_api(league_code, date_from, date_to)
+        with open(os.path.join(output_dir, f'{name}.json'), 'w') as f:
+            json.dump({'matches': matches}, f)
+        print(f"✓ {name}: {len(matches)} matches")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Football-Data replay stand-in')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    serve = subparsers.add_parser('serve', help='Serve recorded or synthetic responses')
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=8081)
+    serve.add_argument('--recordings', help='Directory with recorded JSON responses')
+    serve.add_argument('--synthetic-size', type=int, default=DEFAULT_SYNTHETIC_SIZE,
+                       help='Synthetic matches to serve when no recordings are given')
+    serve.add_argument('--latency-ms', type=float, default=0)
+    serve.add_argument('--jitter-ms', type=float, default=0)
+    serve.add_argument('--rate-429', type=float, default=0.0, help='Fraction of 429 responses')
+    serve.add_argument('--error-rate', type=float, default=0.0, help='Fraction of 500 responses')
+    serve.add_argument('--seed', type=int)
+
+    rec = subparsers.add_parser('record', help='Record real API responses')
+    rec.add_argument('--output', default='recordings')
+    rec.add_argument('--days-back', type=int, default=7)
+    rec.add_argument('--days-ahead', type=int, default=14)
+
+    args = parser.parse_args(argv)
+    if args.command == 'record':
+        record(args.output, args.days_back, args.days_ahead)
+        return 0
+
+    if args.recordings:
+        matches = load_recordings(args.recordings)
+    else:
+        matches = list(synthetic_matches(args.synthetic_size))
+    replay = create_replay_app(matches, args.latency_ms, args.jitter_ms,
+                               args.rate_429, args.error_rate, args.seed)
+    print(f"Replaying {len(matches)} matches on http://{args.host}:{args.port}/v4")
+    make_server(args.host, args.port, replay, threaded=True).serve_forever()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Production server for Gambit.
+
+Initializes the SQLite schema once in the parent process, then serves the app
+with gunicorn (pre-forked workers x threads) or, where gunicorn is not
+available (Windows), with waitress threads in a single process.
+
+    python serve.py --workers 4 --threads 8
+    python serve.py --sidecar          # one sync process, web workers never sync
+
+Environment: GAMBIT_BIND, GAMBIT_WORKERS, GAMBIT_THREADS, GAMBIT_SERVER.
+With several gunicorn workers METRICS_DIR defaults to a fresh temporary
+directory, so ``/metrics`` sums the counters of every worker.
+"""
+
+import argparse
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def default_workers():
+    """gunicorn's recommended worker count for the current machine."""
+    return multiprocessing.cpu_count() * 2 + 1
+
+
+def pick_server(requested):
+    """Resolve 'auto' to gunicorn when installed, otherwise waitress."""
+    if requested != 'auto':
+        return requested
+    try:
+        import gunicorn  # noqa: F401
+        return 'gunicorn'
+    except ImportError:
+        return 'waitress'
+
+
+def run_gunicorn(wsgi_app, bind, workers, threads, timeout):
+    """Serve ``wsgi_app`` with gunicorn's gthread workers forked from this process."""
+    from gunicorn.app.base import BaseApplication
+
+    class GambitApplication(BaseApplication):
+        def load_config(self):
+            self.cfg.set('bind', bind)
+            self.cfg.set('workers', workers)
+            self.cfg.set('threads', threads)
+            self.cfg.set('worker_class', 'gthread')
+            self.cfg.set('timeout', timeout)
+
+        def load(self):
+            return wsgi_app
+
+    GambitApplication().run()
+
+
+def run_waitress(wsgi_app, bind, threads):
+    """Serve ``wsgi_app`` with waitress (single process, many threads)."""
+    from waitress import serve
+
+    host, _, port = bind.rpartition(':')
+    serve(wsgi_app, host=host or '0.0.0.0', port=int(port), threads=threads)
+
+
+def start_sidecar(interval):
+    """Launch the dedicated sync process (`flask sync --loop`)."""
+    return subprocess.Popen(
+        [sys.executable, '-m', 'flask', '--app', 'app', 'sync', '--loop', '--interval', str(interval)],
+        cwd=PROJECT_DIR,
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Gambit production server')
+    parser.add_argument('--bind', default=os.environ.get('GAMBIT_BIND', '0.0.0.0:8000'))
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('GAMBIT_WORKERS', default_workers())))
+    parser.add_argument('--threads', type=int, default=int(os.environ.get('GAMBIT_THREADS', 4)))
+    parser.add_argument('--server', choices=['auto', 'gunicorn', 'waitress'],
+                        default=os.environ.get('GAMBIT_SERVER', 'auto'))
+    parser.add_argument('--timeout', type=int, default=60, help='gunicorn worker timeout in seconds')
+    parser.add_argument('--sidecar', action='store_true',
+                        help='Run daily sync in a separate process instead of inside web workers')
+    parser.add_argument('--sync-interval', type=int, default=900)
+    args = parser.parse_args(argv)
+
+    if args.sidecar:
+        # Must be set before the app module reads its configuration.
+        os.environ['SYNC_MODE'] = 'sidecar'
+    server = pick_server(args.server)
+    if server == 'gunicorn' and args.workers > 1 and not os.environ.get('METRICS_DIR'):
+        os.environ['METRICS_DIR'] = tempfile.mkdtemp(prefix='gambit-metrics-')
+
+    sys.path.insert(0, PROJECT_DIR)
+    import app as gambit
+
+    # Counters restart with the server, as they would in a single process.
+    gambit.metrics.clear_shared()
+    # Create the schema exactly once, before any worker exists.
+    gambit.init_db()
+
+    sidecar = start_sidecar(args.sync_interval) if args.sidecar else None
+    print(f"Serving Gambit on {args.bind} with {server} "
+          f"({args.workers if server == 'gunicorn' else 1} worker(s) x {args.threads} thread(s), "
+          f"sync={gambit.SYNC_MODE}, cache={gambit.CACHE_BACKEND})")
+    try:
+        if server == 'gunicorn':
+            run_gunicorn(gambit.app, args.bind, args.workers, args.threads, args.timeout)
+        else:
+            run_waitress(gambit.app, args.bind, args.threads)
+    finally:
+        if sidecar is not None:
+            sidecar.terminate()
+            sidecar.wait()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
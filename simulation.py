@@ -0,0 +1,120 @@
+"""
+Vectorized Monte Carlo simulation of a league's remaining fixtures.
+
+Every simulation samples all remaining scorelines at once from independent
+Poisson distributions, adds the resulting points, goal difference and goals
+to the current table with a matrix product and ranks the teams, so a chunk of
+simulations is a handful of NumPy array operations rather than Python loops.
+Chunks get independent child seeds from one ``SeedSequence`` and may run in
+separate processes: the result for a given seed does not depend on the number
+of workers.
+
+Fixtures already under way carry the goals scored so far: only the goals
+still to come are sampled, from the pre-kickoff expectations scaled by the
+share of the match left, and added on top, so the current score is a floor.
+"""
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+DEFAULT_SIMULATIONS = 100000
+CHUNK_SIZE = 10000
+MIN_EXPECTED_GOALS = 0.05
+
+
+def simulate_chunk(seed_sequence, simulations, base, fixtures):
+    """
+    Play the remaining fixtures ``simulations`` times.
+
+    Args:
+        seed_sequence: numpy SeedSequence for this chunk
+        simulations: Number of seasons to simulate
+        base: (points, goal_difference, goals_for) arrays of the current table
+        fixtures: (home_index, away_index, home_expected, away_expected,
+            home_scored, away_scored, remaining) arrays
+
+    Returns:
+        (position_counts, points_sum): counts[team, rank] and summed final points
+    """
+    rng = np.random.default_rng(seed_sequence)
+    points, goal_difference, goals_for = (np.asarray(values, dtype=np.float64) for values in base)
+    home_index, away_index, home_expected, away_expected, home_scored, away_scored, remaining = fixtures
+    teams, matches = len(points), len(home_index)
+
+    home_rate = np.maximum(home_expected, MIN_EXPECTED_GOALS) * remaining
+    away_rate = np.maximum(away_expected, MIN_EXPECTED_GOALS) * remaining
+    home_goals = rng.poisson(home_rate, size=(simulations, matches)) + home_scored
+    away_goals = rng.poisson(away_rate, size=(simulations, matches)) + away_scored
+    home_goals = home_goals.astype(np.float64)
+    away_goals = away_goals.astype(np.float64)
+
+    # Fixture -> team incidence matrices turn per-match values into table deltas.
+    home_of = np.zeros((matches, teams))
+    home_of[np.arange(matches), home_index] = 1
+    away_of = np.zeros((matches, teams))
+    away_of[np.arange(matches), away_index] = 1
+
+    draws = home_goals == away_goals
+    home_points = 3 * (home_goals > away_goals) + draws
+    away_points = 3 * (away_goals > home_goals) + draws
+    final_points = points + home_points @ home_of + away_points @ away_of
+    final_difference = goal_difference + (home_goals - away_goals) @ home_of + (away_goals - home_goals) @ away_of
+    final_goals = goals_for + home_goals @ home_of + away_goals @ away_of
+
+    # Points, then goal difference, then goals scored; remaining ties broken at random.
+    key = final_points * 1e6 + (final_difference + 1000) * 1e3 + final_goals + rng.random((simulations, teams)) * 0.5
+    order = np.argsort(-key, axis=1)
+    flat = (order * teams + np.arange(teams)).ravel()
+    position_counts = np.bincount(flat, minlength=teams * teams).reshape(teams, teams)
+    return position_counts, final_points.sum(axis=0)
+
+
+def run_simulation(base, fixtures, simulations=DEFAULT_SIMULATIONS, seed=0, workers=1):
+    """
+    Simulate the rest of the season and aggregate final positions.
+
+    Args:
+        base: (points, goal_difference, goals_for) sequences, one entry per team
+        fixtures: (home_index, away_index, home_expected, away_expected) sequences,
+            optionally followed by (home_scored, away_scored, remaining) for
+            fixtures under way; by default nothing is scored and all is left
+        simulations: Total number of simulated seasons
+        seed: Seed for reproducible results
+        workers: Processes to spread the chunks over (1 runs inline)
+
+    Returns:
+        (position_probabilities, expected_points): teams x ranks matrix and
+        mean final points per team
+    """
+    base = tuple(np.asarray(values, dtype=np.float64) for values in base)
+    matches = len(fixtures[0])
+    if len(fixtures) == 4:
+        fixtures = (*fixtures, np.zeros(matches), np.zeros(matches), np.ones(matches))
+    fixtures = (
+        np.asarray(fixtures[0], dtype=np.intp),
+        np.asarray(fixtures[1], dtype=np.intp),
+        *(np.asarray(values, dtype=np.float64) for values in fixtures[2:]),
+    )
+    sizes = [CHUNK_SIZE] * (simulations // CHUNK_SIZE)
+    if simulations % CHUNK_SIZE:
+        sizes.append(simulations % CHUNK_SIZE)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    args = (seeds, sizes, [base] * len(sizes), [fixtures] * len(sizes))
+
+    if workers > 1 and len(sizes) > 1:
+        # spawn: safe from threaded web workers, and children only import NumPy.
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=min(workers, len(sizes)), mp_context=context) as pool:
+            results = list(pool.map(simulate_chunk, *args))
+    else:
+        results = list(map(simulate_chunk, *args))
+
+    teams = len(base[0])
+    position_counts = np.zeros((teams, teams), dtype=np.int64)
+    points_sum = np.zeros(teams)
+    for counts, points in results:
+        position_counts += counts
+        points_sum += points
+    return position_counts / simulations, points_sum / simulations
@@ -0,0 +1,318 @@
+"""
+Pluggable upstream data sources for Gambit.
+
+Each ``DataSource`` wraps a fetch function with a hard deadline, an optional
+hedged second attempt fired after the provider's recent p95 latency, and a
+circuit breaker that stops calling a provider that keeps failing. A
+``DataSourceChain`` tries providers in priority order and raises
+``SourcesUnavailable`` when none can answer in time, so callers fall back to
+the SQLite cache with a bounded worst-case latency.
+"""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+# Answers that a second attempt would only repeat (bad key, rate limited).
+NON_RETRYABLE_STATUS = {401, 403, 429}
+
+
+class SourceError(Exception):
+    """A provider answered, but not with usable data (429, 5xx, bad auth...)."""
+
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class SourceTimeout(SourceError):
+    """A provider did not answer before its deadline."""
+
+
+class SourceBusy(SourceError):
+    """Every local slot of a provider stayed taken: says nothing about upstream health."""
+
+
+class SourcesUnavailable(SourceError):
+    """Every provider failed, missed its deadline or has an open circuit."""
+
+
+class CircuitBreaker:
+    """
+    Classic closed / open / half-open breaker.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and
+    ``allow()`` returns False for ``reset_timeout`` seconds; then a single
+    trial call is let through and its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, failure_threshold=3, reset_timeout=60.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state()
+
+    def _state(self):
+        if self._opened_at is None:
+            return 'closed'
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return 'half_open'
+        return 'open'
+
+    def allow(self):
+        with self._lock:
+            state = self._state()
+            if state == 'closed':
+                return True
+            if state == 'half_open' and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def reset(self):
+        """Close the circuit and forget past failures."""
+        self.record_success()
+
+    def release(self):
+        """Give back a call allowed by ``allow()`` that never reached the provider."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
+
+class RateLimiter:
+    """Allow at most ``limit`` calls per sliding ``period`` seconds (per process)."""
+
+    def __init__(self, limit, period=60.0):
+        self.limit = limit
+        self.period = period
+        self._calls = deque()
+        self._lock = threading.Lock()
+
+    def allow(self):
+        now = time.monotonic()
+        with self._lock:
+            while self._calls and now - self._calls[0] >= self.period:
+                self._calls.popleft()
+            if len(self._calls) >= self.limit:
+                return False
+            self._calls.append(now)
+            return True
+
+    def reset(self):
+        with self._lock:
+            self._calls.clear()
+
+
+class LatencyTracker:
+    """Rolling window of successful call latencies used to pick hedge delays."""
+
+    def __init__(self, window=100, min_samples=10):
+        self.min_samples = min_samples
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, pct):
+        """Return the ``pct`` percentile, or None until enough samples exist."""
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return None
+            ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1)
+        return ordered[max(0, index)]
+
+
+class DataSource:
+    """
+    One upstream provider.
+
+    Args:
+        name: Provider name used in logs and metrics
+        fetch: Callable ``fetch(league_code, date_from, date_to, timeout=...)``
+            returning Football-Data shaped match dicts
+        deadline: Seconds the provider gets before it is abandoned
+        hedge: Fire a second attempt after the p95 latency when still waiting
+        default_hedge_delay: Hedge delay until enough latencies are recorded
+        supports: Optional predicate ``supports(league_code, date_from, date_to)``
+        breaker: CircuitBreaker guarding this provider
+        max_in_flight: Calls allowed to run at once. Abandoned calls that
+            ignore their timeout keep a slot until they return, so a provider
+            that hangs runs out of slots instead of threads shared with others.
+    """
+
+    def __init__(self, name, fetch, deadline, hedge=True, default_hedge_delay=1.0,
+                 supports=None, breaker=None, max_in_flight=4):
+        self.name = name
+        self.fetch = fetch
+        self.deadline = deadline
+        self.hedge = hedge
+        self.default_hedge_delay = default_hedge_delay
+        self.supports = supports or (lambda *args: True)
+        self.breaker = breaker or CircuitBreaker()
+        self.latency = LatencyTracker()
+        self.executor = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix=f'gambit-{name}')
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+
+    def submit(self, func, wait=0):
+        """
+        Run ``func`` on this provider's threads.
+
+        Waits up to ``wait`` seconds for a free slot and returns None when
+        every slot stays busy.
+        """
+        acquired = self._slots.acquire(timeout=wait) if wait > 0 else self._slots.acquire(blocking=False)
+        if not acquired:
+            return None
+
+        def run():
+            try:
+                return func()
+            finally:
+                self._slots.release()
+
+        return self.executor.submit(run)
+
+    def hedge_delay(self):
+        """Delay before the hedged attempt: recent p95, capped at half the deadline."""
+        p95 = self.latency.percentile(95)
+        delay = self.default_hedge_delay if p95 is None else p95
+        return max(0.05, min(delay, self.deadline / 2))
+
+
+class DataSourceChain:
+    """Try providers in order with per-provider deadlines and an overall budget."""
+
+    def __init__(self, sources, total_deadline=None, metrics=None):
+        self.sources = list(sources)
+        self.total_deadline = total_deadline
+        self.metrics = metrics
+
+    def reset(self):
+        """Close every circuit and drop recorded latencies."""
+        for source in self.sources:
+            source.breaker.reset()
+            source.latency = LatencyTracker()
+
+    def _incr(self, name, **labels):
+        if self.metrics is not None:
+            self.metrics.incr(name, **labels)
+
+    def fetch(self, league_code=None, date_from=None, date_to=None):
+        """
+        Return matches from the first provider that answers in time.
+
+        Raises:
+            SourcesUnavailable: when every eligible provider failed
+        """
+        return self.fetch_with_source(league_code, date_from, date_to)[1]
+
+    def fetch_with_source(self, league_code=None, date_from=None, date_to=None):
+        """
+        Like ``fetch`` but return ``(source_name, matches)``.
+
+        Raises:
+            SourcesUnavailable: when every eligible provider failed
+        """
+        started = time.monotonic()
+        errors = []
+        for source in self.sources:
+            if not source.supports(league_code, date_from, date_to):
+                continue
+            budget = source.deadline
+            if self.total_deadline is not None:
+                budget = min(budget, self.total_deadline - (time.monotonic() - started))
+                if budget <= 0:
+                    errors.append(f"{source.name}: no time left")
+                    break
+            if not source.breaker.allow():
+                self._incr('source_circuit_open', source=source.name)
+                errors.append(f"{source.name}: circuit open")
+                continue
+            try:
+                matches = self._call(source, budget, league_code, date_from, date_to)
+            except SourceBusy as e:
+                # Local saturation (concurrent syncs, stuck calls): skip without blaming upstream.
+                source.breaker.release()
+                self._incr('source_busy', source=source.name)
+                errors.append(f"{source.name}: {e}")
+                continue
+            except Exception as e:
+                source.breaker.record_failure()
+                self._incr('source_failures', source=source.name)
+                errors.append(f"{source.name}: {type(e).__name__}: {e}")
+                continue
+            source.breaker.record_success()
+            return source.name, matches
+        raise SourcesUnavailable('; '.join(errors) or 'no data source supports this request')
+
+    def _call(self, source, budget, league_code, date_from, date_to):
+        """Run one provider with an optional hedged attempt, bounded by ``budget``."""
+        started = time.monotonic()
+        deadline = started + budget
+
+        def attempt():
+            attempt_started = time.monotonic()
+            result = source.fetch(league_code, date_from, date_to,
+                                  timeout=max(0.01, deadline - attempt_started))
+            source.latency.record(time.monotonic() - attempt_started)
+            return result
+
+        # Concurrent callers queue for a slot within the budget; a provider whose
+        # slots are all held by stuck calls is skipped once the budget runs out.
+        first = source.submit(attempt, wait=budget)
+        if first is None:
+            raise SourceBusy(f"no free slot within {budget:.2f}s (earlier calls still running)")
+        pending = {first}
+        hedge_at = started + source.hedge_delay() if source.hedge else None
+        last_error = None
+        while True:
+            now = time.monotonic()
+            if now >= deadline:
+                raise SourceTimeout(f"no answer within {budget:.2f}s")
+            wake_at = deadline if hedge_at is None else min(deadline, hedge_at)
+            done, pending = wait(pending, timeout=max(0, wake_at - now), return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    return future.result()
+                except SourceError as e:
+                    if e.status_code in NON_RETRYABLE_STATUS:
+                        raise
+                    last_error = e
+                except Exception as e:
+                    last_error = e
+            fire_hedge = hedge_at is not None and (bool(done) or time.monotonic() >= hedge_at)
+            if fire_hedge:
+                # Slow first attempt (hedge) or fast failure (single retry).
+                hedge_at = None
+                hedged = source.submit(attempt)
+                if hedged is not None:
+                    self._incr('source_hedges', source=source.name)
+                    pending.add(hedged)
+                elif not pending:
+                    raise last_error
+            elif not pending:
+                raise last_error
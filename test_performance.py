@@ -0,0 +1,1056 @@
+"""
+Performance-oriented checks for Gambit.
+
+These tests run fully offline: every test works against a temporary SQLite
+database and pre-marks the sync state so no request reaches Football-Data.
+"""
+
+import sys
+import os
+import json
+import multiprocessing
+import sqlite3
+import subprocess
+import threading
+import time
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+# Add app to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import app
+import backtest
+import benchmark
+from cache import LocalCache, SQLiteCache
+from metrics import Metrics
+from records import MatchRecord
+from sources import CircuitBreaker, DataSource, DataSourceChain, SourceError, SourcesUnavailable
+import loadtest
+from replay_server import ReplayServer, create_replay_app
+
+# Budgets for a cold `import app`; soccerdata + pandas alone blow through both.
+MAX_IMPORT_SECONDS = 1.0
+MAX_IMPORT_RSS_MB = 100
+
+STARTUP_PROBE = '''
+import json, resource, sys, time
+start = time.perf_counter()
+sys.path.insert(0, sys.argv[1])
+import app
+elapsed = time.perf_counter() - start
+print(json.dumps({
+    'seconds': elapsed,
+    'rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    'heavy_modules': sorted(m for m in ('soccerdata', 'pandas') if m in sys.modules),
+}))
+'''
+
+
+def make_match(match_id, league_code='PL', days_ahead=0, home=('Arsenal FC', 57),
+               away=('Chelsea FC', 61), status='SCHEDULED', score=(None, None)):
+    """Build a Football-Data style match payload for tests."""
+    kickoff = (datetime.utcnow() + timedelta(days=days_ahead)).strftime('%Y-%m-%dT15:00:00Z')
+    return {
+        'id': match_id,
+        'utcDate': kickoff,
+        'status': status,
+        'competition': {'code': league_code, 'name': app.LEAGUE_NAMES.get(league_code, league_code)},
+        'homeTeam': {'id': home[1], 'name': home[0]},
+        'awayTeam': {'id': away[1], 'name': away[0]},
+        'score': {'fullTime': {'home': score[0], 'away': score[1]}},
+    }
+
+
+@contextmanager
+def temporary_database():
+    """Point the app at a fresh SQLite file for the duration of a test."""
+    previous = app.SQLITE_DB_PATH
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        app.SQLITE_DB_PATH = os.path.join(tmp_dir, 'gambit-test.db')
+        app.init_db()
+        app.data_sources.reset()
+        app.fallback_matches_cache.clear()
+        app.id_lookup_breaker.reset()
+        app.id_lookup_limiter.reset()
+        app.missing_match_ids_cache.clear()
+        try:
+            yield app.SQLITE_DB_PATH
+        finally:
+            app.SQLITE_DB_PATH = previous
+
+
+def mark_window_synced(league_code, date_from, date_to):
+    """Pretend today's sync already happened so get_matches stays offline."""
+    app.mark_sync_state(app.build_cache_key(league_code, date_from, date_to), 'success')
+
+
+def test_metrics_instrumentation():
+    """Test: Server-Timing header, counters and /metrics endpoint"""
+    print("\n" + "="*80)
+    print("TEST: Metrics Instrumentation")
+    print("="*80)
+
+    previous = app.metrics.enabled
+    app.metrics.enabled = True
+    app.metrics.reset()
+    try:
+        with temporary_database():
+            today = datetime.now().strftime('%Y-%m-%d')
+            end_date = (datetime.now() + timedelta(days=14)).strftime('%Y-%m-%d')
+            app.upsert_matches([make_match(1), make_match(2, days_ahead=1)])
+            mark_window_synced('PL', today, end_date)
+
+            client = app.app.test_client()
+            response = client.get('/leagues/PL')
+            assert response.status_code == 200, "League page not accessible"
+            server_timing = response.headers.get('Server-Timing', '')
+            for span in ('db_read', 'predict', 'render', 'total'):
+                assert f'{span};dur=' in server_timing, f"Missing span in Server-Timing: {span}"
+            print(f"✓ Server-Timing: {server_timing}")
+
+            assert app.metrics.counter_value('rows_upserted') == 2, "rows_upserted not counted"
+            assert app.metrics.counter_value('cache_hits', cache='sqlite') == 1, "cache hit not counted"
+            print("✓ Counters updated")
+
+            response = client.get('/metrics')
+            assert response.status_code == 200, "Metrics endpoint not accessible"
+            body = response.data.decode('utf-8')
+            assert 'gambit_rows_upserted_total 2' in body, "Missing rows_upserted in /metrics"
+            assert 'gambit_span_seconds_total{span="db_read"}' in body, "Missing span totals"
+            assert 'gambit_http_requests_total{endpoint="league_predictions",status="200"} 1' in body
+            print("✓ /metrics exposes Prometheus text")
+
+        app.metrics.enabled = False
+        response = app.app.test_client().get('/metrics')
+        assert response.status_code == 404, "Metrics endpoint should be hidden when disabled"
+        print("✓ /metrics disabled by default")
+    finally:
+        app.metrics.enabled = previous
+        app.metrics.reset()
+
+    with tempfile.TemporaryDirectory() as metrics_dir:
+        worker_a = Metrics(enabled=True, shared_dir=metrics_dir)
+        worker_b = Metrics(enabled=True, shared_dir=metrics_dir)
+        worker_a.incr('api_calls', 2)
+        worker_b.incr('api_calls')
+        worker_b.incr('cache_hits', cache='sqlite')
+        process = multiprocessing.get_context('fork').Process(target=worker_a.incr, args=('api_calls', 4))
+        process.start()
+        process.join()
+        for worker in (worker_a, worker_b):
+            body = worker.render_prometheus()
+            assert 'gambit_api_calls_total 7' in body, body
+            assert 'gambit_cache_hits_total{cache="sqlite"} 1' in body, body
+        worker_a.clear_shared()
+        assert 'gambit_api_calls_total 2' in worker_a.render_prometheus(), "Own totals lost on clear"
+    print("✓ Workers sharing METRICS_DIR report the same totals")
+
+    print("\n✅ Metrics Instrumentation: PASSED")
+    return True
+
+
+def test_benchmark_suite_runs_offline():
+    """Test: benchmark suite produces comparable JSON results"""
+    print("\n" + "="*80)
+    print("TEST: Benchmark Suite")
+    print("="*80)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        output = os.path.join(tmp_dir, 'results.json')
+        assert benchmark.main(['--sizes', '200', '--repeat', '1', '--output', output]) == 0
+        with open(output) as f:
+            report = json.load(f)
+        results = report['results']['200']
+        for name in ('build_database', 'get_matches_from_db[home 1d]', 'should_sync_today'):
+            assert name in results, f"Missing benchmark: {name}"
+        print(f"✓ {len(results)} benchmarks recorded")
+
+        assert benchmark.main(['--sizes', '200', '--repeat', '1', '--output', output,
+                               '--baseline', output, '--tolerance', '100']) == 0
+        print("✓ Baseline comparison works")
+
+    print("\n✅ Benchmark Suite: PASSED")
+    return True
+
+
+def test_replay_server_and_load_test():
+    """Test: app syncs from the replay stand-in and survives a small load test"""
+    print("\n" + "="*80)
+    print("TEST: Replay Server + Load Test")
+    print("="*80)
+
+    matches = list(benchmark.synthetic_matches(300, span_days=30))
+    previous_url = app.FOOTBALL_DATA_BASE_URL
+    try:
+        with temporary_database():
+            with ReplayServer(create_replay_app(matches, rate_429=1.0, seed=1)) as replay:
+                app.FOOTBALL_DATA_BASE_URL = replay.base_url
+                assert app.get_matches('PL') == [], "429 should fall back to the empty SQLite cache"
+                assert app.should_sync_today(app.build_cache_key('PL', None, None)), "429 marked as synced"
+                print("✓ 429 injection handled")
+            app.data_sources.reset()
+
+            with ReplayServer(create_replay_app(matches, latency_ms=5, seed=1)) as replay:
+                app.FOOTBALL_DATA_BASE_URL = replay.base_url
+                league_matches = app.get_matches('PL')
+                assert league_matches, "No matches synced from replay server"
+                assert all(m['competition']['code'] == 'PL' for m in league_matches)
+                print(f"✓ Synced {len(league_matches)} PL matches from replay server")
+
+                with ReplayServer(app.app) as web:
+                    base_url = web.base_url[:-len('/v4')]
+                    match_ids = loadtest.discover_match_ids(base_url)
+                    paths = loadtest.build_paths(['PL'], match_ids)
+                    report = loadtest.run_load(base_url, paths, concurrency=4, total_requests=40)
+                assert report['overall']['requests'] == 40, "Unexpected request count"
+                assert report['overall']['status_codes'] == {'200': 40}, report['overall']['status_codes']
+                print(f"✓ Load test p95: {report['overall']['p95_ms']}ms")
+    finally:
+        app.FOOTBALL_DATA_BASE_URL = previous_url
+
+    print("\n✅ Replay Server + Load Test: PASSED")
+    return True
+
+
+def test_fast_startup():
+    """Test: importing the app is fast, light and free of side effects"""
+    print("\n" + "="*80)
+    print("TEST: Fast Startup")
+    print("="*80)
+
+    project_dir = os.path.dirname(os.path.abspath(__file__))
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        env = dict(os.environ, SQLITE_DB_PATH=os.path.join(tmp_dir, 'gambit.db'))
+        output = subprocess.run(
+            [sys.executable, '-c', STARTUP_PROBE, project_dir],
+            cwd=tmp_dir, env=env, capture_output=True, text=True, check=True,
+        ).stdout
+        probe = json.loads(output.strip().splitlines()[-1])
+        assert probe['heavy_modules'] == [], f"Heavy modules imported eagerly: {probe['heavy_modules']}"
+        print("✓ soccerdata and pandas are loaded lazily")
+        assert probe['seconds'] < MAX_IMPORT_SECONDS, f"Import took {probe['seconds']:.2f}s"
+        print(f"✓ Import time: {probe['seconds']:.3f}s")
+        assert probe['rss_mb'] < MAX_IMPORT_RSS_MB, f"RSS after import: {probe['rss_mb']:.1f}MB"
+        print(f"✓ RSS after import: {probe['rss_mb']:.1f}MB")
+        assert not os.path.exists(env['SQLITE_DB_PATH']), "Importing the app created the database"
+        print("✓ No database created at import time")
+
+    with temporary_database() as db_path:
+        app.init_db()
+        app.init_db(force=True)
+        assert app.should_sync_today('PL|NONE|NONE'), "Schema missing after repeated init_db"
+        print(f"✓ init_db is idempotent ({os.path.basename(db_path)})")
+
+    print("\n✅ Fast Startup: PASSED")
+    return True
+
+
+def _claim_in_worker(args):
+    """Run claim_sync from a separate process, as a gunicorn worker would."""
+    db_path, cache_key = args
+    app.SQLITE_DB_PATH = db_path
+    return app.claim_sync(cache_key)
+
+
+def test_multi_worker_shared_state():
+    """Test: one sync owner across processes and a cache shared by workers"""
+    print("\n" + "="*80)
+    print("TEST: Multi-worker Shared State")
+    print("="*80)
+
+    with temporary_database() as db_path:
+        cache_key = app.build_cache_key('PL', None, None)
+        with multiprocessing.get_context('fork').Pool(8) as pool:
+            claims = pool.map(_claim_in_worker, [(db_path, cache_key)] * 8)
+        assert claims.count(True) == 1, f"Expected exactly one sync owner, got {claims}"
+        print("✓ Exactly one of 8 processes owns the sync")
+
+        assert not app.claim_sync(cache_key), "In-progress claim should block other workers"
+        app.mark_sync_state(cache_key, 'success')
+        assert not app.claim_sync(cache_key), "Synced window should not be claimed again today"
+        app.mark_sync_state(cache_key, 'error', 'timeout')
+        assert app.claim_sync(cache_key), "Failed sync should be retried"
+        previous_lease = app.SYNC_LEASE_SECONDS
+        app.SYNC_LEASE_SECONDS = -1
+        try:
+            assert app.claim_sync(cache_key), "Expired lease should be reclaimable"
+        finally:
+            app.SYNC_LEASE_SECONDS = previous_lease
+        print("✓ Claims respect success, errors and lease expiry")
+
+        blocker = app.get_db_connection()
+        blocker.execute("BEGIN IMMEDIATE")
+        try:
+            other_key = app.build_cache_key('PD', None, None)
+            start = time.monotonic()
+            assert not app.claim_sync(other_key), "Locked database should not hand out the claim"
+            assert time.monotonic() - start < 2, "Claim waited for the whole write"
+            assert app.app.test_client().get('/leagues/PL').status_code == 200
+        finally:
+            blocker.rollback()
+            blocker.close()
+        print("✓ Held write lock: claim skipped, page served from SQLite")
+
+        worker_a = SQLiteCache(app.get_db_connection, 'team_stats')
+        worker_b = SQLiteCache(app.get_db_connection, 'team_stats')
+        worker_a.set('PL_Arsenal FC', {'avg_goals_scored': 2.1})
+        assert worker_b.get('PL_Arsenal FC') == {'avg_goals_scored': 2.1}, "Cache not shared"
+        worker_b.set('expired', 1, ttl=-1)
+        assert worker_a.get('expired') is None, "Expired entry returned"
+        print("✓ SQLite cache is shared between workers")
+
+        previous_mode = app.SYNC_MODE
+        app.SYNC_MODE = 'sidecar'
+        try:
+            assert app.get_matches('BL1') == [], "Sidecar mode should serve from SQLite only"
+            assert app.should_sync_today(app.build_cache_key('BL1', None, None)), "Web worker synced"
+        finally:
+            app.SYNC_MODE = previous_mode
+        print("✓ Sidecar mode keeps web workers off the upstream API")
+
+    print("\n✅ Multi-worker Shared State: PASSED")
+    return True
+
+
+class FakeProvider:
+    """Scripted provider: each call pops the next (delay, result-or-exception)."""
+
+    def __init__(self, *script):
+        self.script = list(script)
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, league_code, date_from, date_to, timeout=None):
+        with self.lock:
+            self.calls += 1
+            delay, outcome = self.script[min(self.calls, len(self.script)) - 1]
+        time.sleep(delay)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+def test_hedged_data_sources():
+    """Test: hedging, deadlines, fallback and circuit breaking bound upstream latency"""
+    print("\n" + "="*80)
+    print("TEST: Hedged Data Sources")
+    print("="*80)
+
+    slow_then_fast = FakeProvider((1.0, ['slow']), (0.0, ['hedged']))
+    chain = DataSourceChain([DataSource('primary', slow_then_fast, deadline=2, default_hedge_delay=0.1)])
+    start = time.monotonic()
+    assert chain.fetch('PL') == ['hedged'], "Hedged attempt should win"
+    assert time.monotonic() - start < 0.5, "Hedge did not cut latency"
+    print("✓ Hedged attempt answers before the slow one")
+
+    hanging = FakeProvider((2.0, ['late']))
+    chain = DataSourceChain([DataSource('primary', hanging, deadline=0.3, hedge=False)])
+    start = time.monotonic()
+    try:
+        chain.fetch('PL')
+        assert False, "Deadline should have been enforced"
+    except SourcesUnavailable:
+        pass
+    assert time.monotonic() - start < 0.6, "Deadline not enforced"
+    print("✓ Per-provider deadline enforced")
+
+    failing = FakeProvider((0.0, SourceError('boom', 500)))
+    fallback = FakeProvider((0.0, ['fallback']))
+    chain = DataSourceChain([
+        DataSource('primary', failing, deadline=1, breaker=CircuitBreaker(failure_threshold=2)),
+        DataSource('secondary', fallback, deadline=1),
+    ])
+    assert chain.fetch('PL') == ['fallback'], "Fallback provider not used"
+    assert failing.calls == 2, "Fast failure should be retried exactly once"
+    chain.fetch('PL')
+    calls_before = failing.calls
+    assert chain.fetch('PL') == ['fallback']
+    assert failing.calls == calls_before, "Open circuit still called the provider"
+    print("✓ Fallback provider and circuit breaker")
+
+    rate_limited = FakeProvider((0.0, SourceError('rate limit', 429)))
+    chain = DataSourceChain([DataSource('primary', rate_limited, deadline=1)])
+    try:
+        chain.fetch('PL')
+    except SourcesUnavailable:
+        pass
+    assert rate_limited.calls == 1, "429 must not be retried"
+    print("✓ 429 answers are not retried")
+
+    stuck = FakeProvider((1.0, ['stuck']))
+    healthy = FakeProvider((0.0, ['healthy']))
+    chain = DataSourceChain([
+        DataSource('stuck', stuck, deadline=0.1, hedge=False, max_in_flight=1),
+        DataSource('healthy', healthy, deadline=1),
+    ])
+    assert chain.fetch('PL') == ['healthy']
+    start = time.monotonic()
+    for _ in range(3):
+        assert chain.fetch('PL') == ['healthy'], "Saturated provider should be skipped"
+    assert time.monotonic() - start < 0.6, "Saturated provider held the chain past its deadline"
+    assert stuck.calls == 1, "Stuck provider got a call beyond its in-flight cap"
+    assert chain.sources[0].breaker.state == 'closed', "Busy slots counted as upstream failures"
+    print("✓ Stuck provider capped to its own threads")
+
+    steady = FakeProvider((0.5, ['steady']))
+    chain = DataSourceChain([DataSource('steady', steady, deadline=3, hedge=False, max_in_flight=2)])
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(chain.fetch('PL'))) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [['steady']] * 6, f"Concurrent fetches failed on local slots: {results}"
+    assert chain.sources[0].breaker.state == 'closed'
+    print("✓ Concurrent fetches queue for a slot instead of tripping the breaker")
+
+    matches = [make_match(1)]
+    with temporary_database():
+        app.upsert_matches(matches)
+        primary = app.data_sources.sources[0]
+        previous_url, previous_deadline = app.FOOTBALL_DATA_BASE_URL, primary.deadline
+        primary.deadline = 0.5
+        try:
+            with ReplayServer(create_replay_app(matches, latency_ms=3000)) as replay:
+                app.FOOTBALL_DATA_BASE_URL = replay.base_url
+                start = time.monotonic()
+                served = app.get_matches('PL')
+                elapsed = time.monotonic() - start
+        finally:
+            app.FOOTBALL_DATA_BASE_URL, primary.deadline = previous_url, previous_deadline
+        assert [m['id'] for m in served] == [1], "SQLite fallback not served"
+        assert elapsed < 1.5, f"Slow upstream held the request for {elapsed:.2f}s"
+        print(f"✓ Slow upstream bounded to {elapsed:.2f}s, served from SQLite")
+
+    fbref_match = make_match(2**40, home=('Arsenal', None), away=('Chelsea', None))
+    with temporary_database():
+        secondary = app.data_sources.sources[1]
+        previous = (app.FOOTBALL_DATA_BASE_URL, app.USE_SOCCERDATA, secondary.fetch, app.SYNC_FALLBACK_RETRY_SECONDS)
+        app.USE_SOCCERDATA = True
+        secondary.fetch = FakeProvider((0.0, [fbref_match]))
+        cache_key = app.build_cache_key('PL', None, None)
+        try:
+            rate_limited_app = create_replay_app([make_match(1)], rate_429=1.0)
+            with ReplayServer(rate_limited_app) as replay:
+                app.FOOTBALL_DATA_BASE_URL = replay.base_url
+                served = app.get_matches('PL')
+                assert [m.id for m in served] == [fbref_match['id']], "Fallback matches not served"
+                assert app.get_matches_by_ids([fbref_match['id']]) == {}, "Fallback rows were stored"
+                assert not app.should_sync_today(cache_key), "Fallback should wait before retrying"
+                assert [m.id for m in app.get_matches('PL')] == [fbref_match['id']]
+                assert rate_limited_app.config['REPLAY_STATS']['requests'] == 1, "Retried before the interval"
+            app.data_sources.reset()
+            app.SYNC_FALLBACK_RETRY_SECONDS = 0
+            with ReplayServer(create_replay_app([make_match(1)])) as replay:
+                app.FOOTBALL_DATA_BASE_URL = replay.base_url
+                assert [m.id for m in app.get_matches('PL')] == [1], "Primary not retried after fallback"
+        finally:
+            (app.FOOTBALL_DATA_BASE_URL, app.USE_SOCCERDATA, secondary.fetch,
+             app.SYNC_FALLBACK_RETRY_SECONDS) = previous
+        print("✓ Fallback matches served without being stored, primary retried later")
+
+    print("\n✅ Hedged Data Sources: PASSED")
+    return True
+
+
+def test_full_text_search():
+    """Test: FTS5 search endpoint ranks fixtures and follows upserts"""
+    print("\n" + "="*80)
+    print("TEST: Full-text Search")
+    print("="*80)
+
+    with temporary_database():
+        app.upsert_matches([
+            make_match(1, home=('Arsenal FC', 57), away=('Chelsea FC', 61)),
+            make_match(2, home=('Liverpool FC', 64), away=('Arsenal FC', 57), days_ahead=3),
+            make_match(3, league_code='PD', home=('Club Atlético de Madrid', 78), away=('Real Madrid CF', 86)),
+        ])
+        client = app.app.test_client()
+
+        data = client.get('/api/search?q=arsen').get_json()
+        assert data['success'] and data['count'] == 2, data
+        assert {p['match_id'] for p in data['predictions']} == {1, 2}
+        assert all('predicted_score' in p for p in data['predictions']), "Hits must carry predictions"
+        print(f"✓ Prefix search found {data['count']} Arsenal fixtures")
+
+        data = client.get('/api/search?q=atletico madrid').get_json()
+        assert [p['match_id'] for p in data['predictions']] == [3], "Diacritics-insensitive search failed"
+        data = client.get('/api/search?q=madrid&league=PL').get_json()
+        assert data['count'] == 0, "League filter ignored"
+        print("✓ Accent-insensitive matching and league filter")
+
+        app.upsert_matches([make_match(1, home=('Tottenham Hotspur FC', 73), away=('Chelsea FC', 61))])
+        ids = {p['match_id'] for p in client.get('/api/search?q=arsenal').get_json()['predictions']}
+        assert ids == {2}, "Index not updated by upsert_matches"
+        assert client.get('/api/search?q=tottenham').get_json()['count'] == 1
+        print("✓ upsert_matches keeps the index in sync")
+
+        with app.get_db_connection() as conn:
+            conn.execute("DELETE FROM matches_fts")
+        app.init_db(force=True)
+        assert client.get('/api/search?q=liverpool').get_json()['count'] == 1, "Backfill failed"
+        print("✓ Existing caches are backfilled")
+
+        response = client.get('/api/search')
+        assert response.status_code == 400, "Missing query should be rejected"
+        print("✓ Missing query rejected")
+
+    print("\n✅ Full-text Search: PASSED")
+    return True
+
+
+def test_team_history_api():
+    """Test: team form and head-to-head aggregated from the local cache"""
+    print("\n" + "="*80)
+    print("TEST: Team History API")
+    print("="*80)
+
+    arsenal, chelsea, spurs = ('Arsenal FC', 57), ('Chelsea FC', 61), ('Tottenham Hotspur FC', 73)
+    with temporary_database():
+        app.upsert_matches([
+            make_match(1, days_ahead=-30, home=arsenal, away=chelsea, status='FINISHED', score=(2, 0)),
+            make_match(2, days_ahead=-20, home=chelsea, away=arsenal, status='FINISHED', score=(1, 1)),
+            make_match(3, days_ahead=-10, home=spurs, away=arsenal, status='FINISHED', score=(3, 1)),
+            make_match(4, days_ahead=5, home=arsenal, away=chelsea),
+        ])
+        client = app.app.test_client()
+
+        data = client.get('/api/team/57/matches').get_json()
+        assert data['success'] and data['team']['name'] == 'Arsenal FC', data
+        assert [m['match_id'] for m in data['matches']] == [4, 3, 2, 1], "Matches not newest first"
+        form = data['form']
+        assert (form['played'], form['wins'], form['draws'], form['losses']) == (3, 1, 1, 1), form
+        assert (form['goals_for'], form['goals_against']) == (4, 4), form
+        assert form['form'] == 'LDW', form
+        print(f"✓ Team form: {form['form']} ({form['goals_for']}-{form['goals_against']})")
+
+        summary = client.get('/api/h2h/57/61').get_json()['summary']
+        assert (summary['played'], summary['wins'], summary['draws'], summary['losses']) == (2, 1, 1, 0), summary
+        reverse = client.get('/api/h2h/61/57').get_json()['summary']
+        assert (reverse['wins'], reverse['losses'], reverse['goals_for']) == (0, 1, 1), reverse
+        print("✓ Head-to-head from both sides")
+
+        kickoff_before_third = make_match(0, days_ahead=-15)['utcDate']
+        early = app.summarize_team_results(57, before=kickoff_before_third)
+        assert early['played'] == 2, "before= must exclude later matches"
+        assert client.get('/api/team/999/matches').status_code == 404
+        print("✓ 'before' cutoff and unknown team")
+
+        previous = app.USE_LOCAL_HISTORY
+        app.USE_LOCAL_HISTORY = True
+        try:
+            prediction = app.generate_prediction(make_match(4, days_ahead=5, home=arsenal, away=chelsea))
+        finally:
+            app.USE_LOCAL_HISTORY = previous
+        assert prediction['data_source'] == 'local_history', prediction['data_source']
+        assert prediction['team_stats']['home']['total_matches'] == 3
+        print("✓ Prediction model fed from local history")
+
+    print("\n✅ Team History API: PASSED")
+    return True
+
+
+def test_incremental_standings():
+    """Test: standings follow FINISHED transitions, corrections and backfill"""
+    print("\n" + "="*80)
+    print("TEST: Incremental Standings")
+    print("="*80)
+
+    arsenal, chelsea, spurs = ('Arsenal FC', 57), ('Chelsea FC', 61), ('Tottenham Hotspur FC', 73)
+
+    def table():
+        return {row['team_name']: (row['played'], row['points'], row['goal_difference'], row['form'])
+                for row in app.get_standings('PL')[1]}
+
+    with temporary_database():
+        app.upsert_matches([
+            make_match(1, days_ahead=-7, home=arsenal, away=chelsea, status='FINISHED', score=(2, 0)),
+            make_match(2, days_ahead=-3, home=spurs, away=arsenal, status='FINISHED', score=(1, 1)),
+            make_match(3, days_ahead=2, home=chelsea, away=spurs),
+        ])
+        assert table() == {
+            'Arsenal FC': (2, 4, 2, 'DW'),
+            'Tottenham Hotspur FC': (1, 1, 0, 'D'),
+            'Chelsea FC': (1, 0, -2, 'L'),
+        }, table()
+        print("✓ Finished matches counted, scheduled ones ignored")
+
+        app.upsert_matches([make_match(3, days_ahead=2, home=chelsea, away=spurs, status='FINISHED', score=(0, 3))])
+        app.upsert_matches([make_match(1, days_ahead=-7, home=arsenal, away=chelsea, status='FINISHED', score=(2, 0))])
+        assert table()['Chelsea FC'] == (2, 0, -5, 'LL'), table()
+        assert table()['Tottenham Hotspur FC'] == (2, 4, 3, 'WD'), table()
+        print("✓ SCHEDULED -> FINISHED transition applied once")
+
+        app.upsert_matches([make_match(1, days_ahead=-7, home=arsenal, away=chelsea, status='FINISHED', score=(0, 1))])
+        assert table()['Arsenal FC'] == (2, 1, -1, 'DL'), table()
+        app.upsert_matches([make_match(2, days_ahead=-3, home=spurs, away=arsenal, status='POSTPONED')])
+        assert table()['Arsenal FC'] == (1, 0, -1, 'L'), table()
+        print("✓ Score corrections and status reversals are undone")
+
+        replayed = make_match(2, days_ahead=-3, home=spurs, away=arsenal, status='FINISHED', score=(1, 1))
+        app.upsert_matches([replayed, replayed])
+        assert table()['Arsenal FC'] == (2, 1, -1, 'DL'), table()
+        with app.get_db_connection() as conn:
+            assert conn.execute("SELECT COUNT(*) FROM matches_fts WHERE rowid = 2").fetchone()[0] == 1
+        print("✓ A match repeated in one batch is applied once")
+
+        incremental = table()
+        with app.get_db_connection() as conn:
+            conn.execute("DELETE FROM standings_applied")
+            conn.execute("DELETE FROM standings")
+        app.init_db(force=True)
+        assert table() == incremental, "Backfill differs from incremental maintenance"
+        print("✓ Backfill matches incremental result")
+
+        client = app.app.test_client()
+        data = client.get('/api/standings/PL').get_json()
+        assert data['success'] and data['standings'][0]['team_name'] == 'Tottenham Hotspur FC', data
+        assert data['standings'][0]['position'] == 1
+        assert client.get('/api/standings/XX').status_code == 404
+        today = datetime.now().strftime('%Y-%m-%d')
+        fortnight = (datetime.now() + timedelta(days=14)).strftime('%Y-%m-%d')
+        mark_window_synced('PL', today, fortnight)
+        html = client.get('/leagues/PL').data.decode('utf-8')
+        assert 'standings-table' in html and 'Tottenham Hotspur FC' in html, "League page panel missing"
+        print("✓ /api/standings and league page panel")
+
+        app.upsert_matches([make_match(4, league_code='CL', days_ahead=-2, home=arsenal,
+                                       away=('FC Bayern München', 5), status='FINISHED', score=(3, 1))])
+        with app.get_db_connection() as conn:
+            assert conn.execute("SELECT 1 FROM standings_applied WHERE match_id = 4").fetchone(), \
+                "Cup results must stay available to the backtest"
+            assert conn.execute("SELECT 1 FROM standings WHERE league_code = 'CL'").fetchone() is None
+            conn.execute("INSERT INTO standings (league_code, season, team_id, played) VALUES ('CL', '2025', 5, 1)")
+        app.init_db(force=True)
+        assert app.get_standings('CL') == (None, []), "Old cup table not removed"
+        assert client.get('/api/standings/CL').status_code == 404
+        mark_window_synced('CL', today, fortnight)
+        assert 'standings-table' not in client.get('/leagues/CL').data.decode('utf-8')
+        print("✓ Cups get no table")
+
+    print("\n✅ Incremental Standings: PASSED")
+    return True
+
+
+def test_backtest_engine():
+    """Test: backtest replays finished matches without seeing their results"""
+    print("\n" + "="*80)
+    print("TEST: Backtest Engine")
+    print("="*80)
+
+    probabilities = backtest.market_probabilities(1.5, 1.1)
+    assert abs(sum(probabilities['result']) - 1) < 1e-9, probabilities
+    assert probabilities['result'][0] > probabilities['result'][2]
+    assert 0 < probabilities['over_2_5'] < 1 and 0 < probabilities['btts'] < 1
+    print("✓ Poisson market probabilities are normalized")
+
+    with temporary_database():
+        benchmark.build_database(2000)
+        with app.get_db_connection() as conn:
+            finished = conn.execute("SELECT COUNT(*) FROM matches WHERE status = 'FINISHED'").fetchone()[0]
+
+        for model in backtest.MODELS:
+            report = backtest.run_backtest(model, workers=2, chunk_size=100)
+            overall = report['overall']
+            assert overall['result']['matches'] == finished, (model, overall, finished)
+            assert sum(g['result']['matches'] for g in report['groups']) == finished
+            # Fed the real score, the model would be right every time.
+            assert overall['result']['accuracy'] < 1, f"{model} saw the final score"
+            for market in backtest.MARKETS:
+                assert overall[market]['log_loss'] > 0 and 0 < overall[market]['brier'] < 2, overall
+            print(f"✓ {model}: {finished} matches in {len(report['groups'])} league/season groups")
+
+        only_pl = backtest.run_backtest('baseline', leagues=['PL'], workers=1)
+        assert {g['league_code'] for g in only_pl['groups']} == {'PL'}
+        print("✓ League filter")
+
+    print("\n✅ Backtest Engine: PASSED")
+    return True
+
+
+def test_season_simulation():
+    """Test: Monte Carlo table odds are normalized, seeded and cached"""
+    print("\n" + "="*80)
+    print("TEST: Season Simulation")
+    print("="*80)
+
+    # NumPy and pyarrow are imported inside their tests: the startup probe
+    # inherits this process's peak RSS.
+    import simulation
+
+    base = ([10, 10, 0], [5, 5, -10], [8, 8, 1])
+    schedule = ([0, 1, 2], [1, 2, 0], [1.4, 2.0, 0.6], [1.1, 0.4, 1.8])
+    positions, expected_points = simulation.run_simulation(base, schedule, simulations=20000, seed=7)
+    assert abs(positions.sum(axis=0) - 1).max() < 1e-9 and abs(positions.sum(axis=1) - 1).max() < 1e-9
+    assert positions[2, 0] == 0, "A team 10 points behind with 2 games left cannot win"
+    assert expected_points[2] < expected_points[0]
+    parallel, _ = simulation.run_simulation(base, schedule, simulations=20000, seed=7, workers=2)
+    assert (parallel == positions).all(), "Result depends on the number of workers"
+    print("✓ Vectorized simulation is normalized and reproducible across workers")
+
+    # 2-0 at the final whistle: nothing left to sample, the score stands.
+    _, decided = simulation.run_simulation(([0, 0], [0, 0], [0, 0]), ([0], [1], [0.3], [2.5], [2], [0], [0.0]),
+                                           simulations=2000, seed=7)
+    assert list(decided) == [3, 0], decided
+    _, halfway = simulation.run_simulation(([0, 0], [0, 0], [0, 0]), ([0], [1], [0.3], [2.5], [2], [0], [0.5]),
+                                           simulations=2000, seed=7)
+    assert halfway[0] > halfway[1], "Current score must be a floor, not a Poisson mean"
+    kickoff = datetime(2025, 8, 16, 15, 0)
+    live = MatchRecord(1, 'PL', 'Premier League', '2025-08-16T15:00:00Z', 'IN_PLAY',
+                       'Arsenal FC', 57, 'Chelsea FC', 61, 1, 0)
+    assert app.remaining_share(live, now=kickoff + timedelta(minutes=20)) == 70 / 90
+    assert app.remaining_share(live, now=kickoff + timedelta(minutes=80)) == 25 / 90  # after half-time
+    assert app.remaining_share(live, now=kickoff + timedelta(hours=3)) == 0
+    live.status = 'PAUSED'
+    assert app.remaining_share(live, now=kickoff + timedelta(hours=3)) == 0.5
+    print("✓ Live fixtures keep their score and only sample the time left")
+
+    arsenal, chelsea, spurs = ('Arsenal FC', 57), ('Chelsea FC', 61), ('Tottenham Hotspur FC', 73)
+    with temporary_database():
+        app.upsert_matches([
+            make_match(1, days_ahead=-7, home=arsenal, away=chelsea, status='FINISHED', score=(2, 0)),
+            make_match(2, days_ahead=-3, home=spurs, away=arsenal, status='FINISHED', score=(1, 1)),
+            make_match(3, days_ahead=2, home=chelsea, away=spurs),
+            make_match(4, days_ahead=5, home=arsenal, away=spurs),
+            make_match(5, home=chelsea, away=arsenal, status='IN_PLAY', score=(1, 0)),
+            make_match(6, days_ahead=-1, home=spurs, away=chelsea, status='CANCELLED'),
+        ])
+        previous_enabled = app.metrics.enabled
+        app.metrics.enabled = True
+        app.metrics.reset()
+        try:
+            first = app.simulate_league('PL', simulations=5000, seed=1)
+            assert first['remaining_fixtures'] == 3 and len(first['teams']) == 3, first
+            assert abs(sum(team['title'] for team in first['teams']) - 1) < 1e-3
+            assert abs(sum(team['relegation'] for team in first['teams']) - 3) < 1e-3  # 3 teams, 3 places
+            assert app.simulate_league('PL', simulations=5000, seed=1) == first
+            assert app.metrics.counter_value('cache_hits', cache='simulation') == 1
+            print("✓ Live fixtures simulated, cancelled ones skipped, result cached")
+
+            app.upsert_matches([make_match(3, days_ahead=2, home=chelsea, away=spurs,
+                                           status='FINISHED', score=(0, 3))])
+            second = app.simulate_league('PL', simulations=5000, seed=1)
+            assert second['remaining_fixtures'] == 2
+            assert app.metrics.counter_value('cache_hits', cache='simulation') == 1
+            print("✓ Finished fixture invalidates the cached simulation")
+        finally:
+            app.metrics.enabled = previous_enabled
+            app.metrics.reset()
+
+        client = app.app.test_client()
+        data = client.get('/api/simulation/PL?simulations=2000&seed=3').get_json()
+        assert data['success'] and data['teams'][0]['team_name'], data
+        assert data['simulations'] == 1000 and data['seed'] == app.SIMULATION_SEED, "Query not pinned"
+        assert client.get('/api/simulation/CL').status_code == 404
+        assert client.get('/api/simulation/PD').status_code == 404
+        print("✓ /api/simulation endpoint")
+
+        for cache in (LocalCache(max_entries=2), SQLiteCache(app.get_db_connection, 'capped', max_entries=2)):
+            for key in ('a', 'b', 'c'):
+                cache.set(key, key)
+            assert cache.get('a') is None and cache.get('b') == 'b' and cache.get('c') == 'c', type(cache)
+        print("✓ Simulation cache size is capped")
+
+    print("\n✅ Season Simulation: PASSED")
+    return True
+
+
+def test_batch_predictions():
+    """Test: batch endpoint resolves ids in one query and one upstream call"""
+    print("\n" + "="*80)
+    print("TEST: Batch Predictions")
+    print("="*80)
+
+    upstream = [make_match(900, days_ahead=1, home=('Liverpool FC', 64), away=('Everton FC', 62))]
+    previous_url = app.FOOTBALL_DATA_BASE_URL
+    try:
+        with temporary_database():
+            app.upsert_matches([
+                make_match(1, days_ahead=1),
+                make_match(2, days_ahead=-2, status='FINISHED', score=(3, 1)),
+            ])
+            replay_app = create_replay_app(upstream)
+            with ReplayServer(replay_app) as replay:
+                app.FOOTBALL_DATA_BASE_URL = replay.base_url
+                client = app.app.test_client()
+
+                data = client.post('/api/predictions/batch', json={'match_ids': [1, 2, 900, 12345, 1]}).get_json()
+                assert data['success'] and data['count'] == 3, data
+                assert set(data['predictions']) == {'1', '2', '900'}, data['predictions'].keys()
+                assert data['predictions']['2']['predicted_score'] == '3-1'
+                assert data['missing'] == [12345], data['missing']
+                assert replay_app.config['REPLAY_STATS']['requests'] == 1, "Missing ids not fetched in one call"
+                print("✓ Cached ids from SQLite, missing ids in one upstream call")
+
+                data = client.post('/api/predictions/batch', json={'match_ids': [900, 1]}).get_json()
+                assert data['count'] == 2 and replay_app.config['REPLAY_STATS']['requests'] == 1
+                assert client.get('/api/match/900').get_json()['success']
+                assert replay_app.config['REPLAY_STATS']['requests'] == 1
+                print("✓ Fetched matches cached for later batches and /api/match/<id>")
+
+                for _ in range(20):
+                    assert client.get('/api/match/424242').status_code == 404
+                assert client.post('/api/predictions/batch', json={'match_ids': [12345]}).get_json()['missing'] == [12345]
+                assert replay_app.config['REPLAY_STATS']['requests'] == 2, "Unknown ids requested again"
+                print("✓ Unknown ids remembered: one upstream call for repeated lookups")
+
+            rate_limited_app = create_replay_app(upstream, rate_429=1.0)
+            with ReplayServer(rate_limited_app) as replay:
+                app.FOOTBALL_DATA_BASE_URL = replay.base_url
+                for match_id in range(5000, 5020):
+                    assert client.get(f'/api/match/{match_id}').status_code == 404
+                assert rate_limited_app.config['REPLAY_STATS']['requests'] <= app.ID_LOOKUP_RATE_LIMIT
+                assert app.data_sources.sources[0].breaker.state == 'closed', "Id lookups opened the sync circuit"
+                assert not app.missing_match_ids_cache.get('5000'), "Failed lookup remembered as missing"
+                print("✓ Id lookups rate limited, with their own circuit breaker")
+
+                assert client.post('/api/predictions/batch', json={}).status_code == 400
+                assert client.post('/api/predictions/batch', json={'match_ids': ['1']}).status_code == 400
+                too_many = list(range(1, app.PREDICTION_BATCH_LIMIT + 2))
+                assert client.post('/api/predictions/batch', json={'match_ids': too_many}).status_code == 400
+                print("✓ Invalid and oversized batches rejected")
+    finally:
+        app.FOOTBALL_DATA_BASE_URL = previous_url
+
+    print("\n✅ Batch Predictions: PASSED")
+    return True
+
+
+def test_columnar_export():
+    """Test: partitioned Parquet/Arrow export with incremental runs"""
+    print("\n" + "="*80)
+    print("TEST: Columnar Export")
+    print("="*80)
+
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import export
+
+    previous_dir, previous_token = app.EXPORT_DIR, app.EXPORT_TOKEN
+    app.EXPORT_TOKEN = ''
+    try:
+        with temporary_database(), tempfile.TemporaryDirectory() as export_dir:
+            app.EXPORT_DIR = export_dir
+            matches = list(benchmark.synthetic_matches(200, span_days=60))
+            app.upsert_matches(matches)
+
+            summary = export.export_matches(app.get_db_connection, export_dir, app.generate_prediction,
+                                            app.season_of, chunk_size=7)
+            assert summary['rows'] == 200 and summary['since'] is None, summary
+            table = ds.dataset(export_dir, format='parquet', partitioning='hive').to_table()
+            assert table.num_rows == 200
+            assert set(table.column('league_code').to_pylist()) == set(app.LEAGUES), "Missing league partitions"
+            finished = table.filter(ds.field('status') == 'FINISHED').to_pylist()
+            assert finished and all(row['score_home'] == row['predicted_home_goals'] for row in finished)
+            assert table.column('expected_home_goals').null_count == 0
+            print(f"✓ Full export: {summary['rows']} rows in {len(summary['files'])} partition files")
+
+            assert app.export_matches()['rows'] == 0, "Unchanged rows exported again"
+            changed = dict(matches[0], status='FINISHED', score={'fullTime': {'home': 4, 'away': 4}})
+            app.upsert_matches([changed])
+            incremental = app.export_matches()
+            assert incremental['rows'] == 1 and len(incremental['files']) == 1, incremental
+            assert incremental['since'] == summary['watermark']
+            print("✓ Incremental export writes only changed rows")
+
+            late = dict(matches[1], status='POSTPONED')
+            app.upsert_matches([late])
+            with app.get_db_connection() as conn:
+                # Stamped before the previous export read, committed after it.
+                conn.execute("UPDATE matches SET updated_at = ? WHERE match_id = ?",
+                             ('2000-01-01T00:00:00Z', late['id']))
+            late_export = app.export_matches()
+            assert late_export['rows'] == 1, "Late commit with an old updated_at was skipped"
+            print("✓ Watermark follows commit order, not updated_at")
+
+            with tempfile.TemporaryDirectory() as arrow_dir:
+                arrow_summary = app.export_matches(arrow_dir, file_format='arrow')
+                assert arrow_summary['rows'] == 200
+                with pa.memory_map(os.path.join(arrow_dir, arrow_summary['files'][0])) as source:
+                    assert pa.ipc.open_file(source).read_all().num_rows > 0
+            print("✓ Arrow IPC files can be memory-mapped")
+
+            predicted = []
+
+            def failing_predict(match):
+                predicted.append(match['id'])
+                if len(predicted) > 150:
+                    raise RuntimeError('worker killed')
+                return app.generate_prediction(match)
+
+            state_before = export.read_state(export_dir)
+            app.upsert_matches([dict(match, status='POSTPONED') for match in matches])
+            try:
+                export.export_matches(app.get_db_connection, export_dir, failing_predict, app.season_of, chunk_size=7)
+                assert False, "Failing export should raise"
+            except RuntimeError:
+                pass
+            on_disk = sorted(os.path.relpath(os.path.join(root, name), export_dir)
+                             for root, _, names in os.walk(export_dir) for name in names if name.startswith('part-'))
+            assert on_disk == sorted(summary['files'] + incremental['files'] + late_export['files']), \
+                "Failed run left part files"
+            assert export.read_state(export_dir) == state_before, "Failed run moved the watermark"
+
+            predicted.clear()
+            try:
+                export.export_matches(app.get_db_connection, export_dir, failing_predict, app.season_of,
+                                      full=True, chunk_size=7)
+                assert False, "Failing full export should raise"
+            except RuntimeError:
+                pass
+            assert sorted(os.path.relpath(path, export_dir) for path in export.published_parts(export_dir)) \
+                == on_disk, "Failed full run deleted the previous dataset"
+            assert export.read_state(export_dir) == state_before, "Failed full run moved the watermark"
+            full_summary = export.export_matches(app.get_db_connection, export_dir, app.generate_prediction,
+                                                 app.season_of, full=True)
+            assert sorted(os.path.relpath(path, export_dir) for path in export.published_parts(export_dir)) \
+                == full_summary['files'], "Full run kept superseded parts"
+            assert ds.dataset(export_dir, format='parquet', partitioning='hive').to_table().num_rows == 200
+            print("✓ Failed exports (incremental or full) keep the dataset and watermark")
+
+            client = app.app.test_client()
+            auth = {'Authorization': 'Bearer secret'}
+            assert client.post('/api/export', json={'format': 'parquet'}).status_code == 403
+            app.EXPORT_TOKEN = 'secret'
+            assert client.post('/api/export', headers={'Authorization': 'Bearer nope'}).status_code == 401
+            assert client.post('/api/export', headers=auth, json={'format': 'csv'}).status_code == 400
+            assert app.claim_sync(app.EXPORT_STATE_KEY, lease_seconds=60, daily=False)
+            assert client.post('/api/export', headers=auth).status_code == 409, "Concurrent export started"
+            try:
+                app.export_matches()
+                assert False, "Concurrent export should be refused"
+            except app.ExportInProgress:
+                pass
+            app.mark_sync_state(app.EXPORT_STATE_KEY, 'success')
+
+            response = client.post('/api/export', headers=auth, json={'format': 'parquet'})
+            assert response.status_code == 202, response.get_json()
+            deadline = time.monotonic() + 10
+            while True:
+                data = client.get('/api/export').get_json()
+                if data['job']['status'] != 'in_progress' or time.monotonic() > deadline:
+                    break
+                time.sleep(0.05)
+            assert data['job']['status'] == 'success', data['job']
+            assert data['state']['watermark'] > summary['watermark'] and data['files'], data
+            download = client.get('/exports/' + data['files'][0]['path'])
+            assert download.status_code == 200 and download.data[:4] == b'PAR1'
+            download.close()
+            print("✓ /api/export runs authenticated exports in the background, one at a time")
+
+        with tempfile.TemporaryDirectory() as legacy_dir:
+            app.EXPORT_DIR = legacy_dir
+            with temporary_database() as db_path:
+                with sqlite3.connect(db_path) as conn:
+                    conn.execute("DROP TABLE matches")
+                    conn.execute(
+                        """
+                        CREATE TABLE matches (
+                            match_id INTEGER PRIMARY KEY, league_code TEXT, competition_name TEXT,
+                            utc_date TEXT, status TEXT, home_team TEXT, home_team_id INTEGER,
+                            away_team TEXT, away_team_id INTEGER, score_home INTEGER, score_away INTEGER,
+                            raw_json TEXT NOT NULL, updated_at TEXT NOT NULL
+                        )
+                        """
+                    )
+                    conn.executemany(
+                        "INSERT INTO matches (match_id, league_code, raw_json, updated_at) VALUES (?, 'PL', ?, ?)",
+                        [(2, json.dumps(make_match(2)), '2025-01-02T00:00:00Z'),
+                         (1, json.dumps(make_match(1)), '2025-01-03T00:00:00Z')],
+                    )
+                conn.close()
+                app.init_db(force=True)
+                with app.get_db_connection() as conn:
+                    seqs = conn.execute("SELECT match_id, change_seq FROM matches ORDER BY match_id").fetchall()
+                assert [tuple(row) for row in seqs] == [(1, 2), (2, 1)], "change_seq not backfilled"
+                export.write_state(legacy_dir, {'watermark': '2025-01-03T00:00:00Z'})
+                assert app.export_matches()['rows'] == 2, "Old updated_at state should force a full export"
+        print("✓ Older caches and export states are migrated")
+    finally:
+        app.EXPORT_DIR, app.EXPORT_TOKEN = previous_dir, previous_token
+
+    print("\n✅ Columnar Export: PASSED")
+    return True
+
+
+def test_compact_match_records():
+    """Test: hot path uses slotted records and decodes raw_json on demand"""
+    print("\n" + "="*80)
+    print("TEST: Compact Match Records")
+    print("="*80)
+
+    with temporary_database():
+        matches = list(benchmark.synthetic_matches(500, span_days=20))
+        app.upsert_matches(matches)
+        records = app.get_matches_from_db()
+        assert len(records) == 500 and all(isinstance(r, MatchRecord) for r in records)
+        assert not hasattr(records[0], '__dict__'), "MatchRecord should use __slots__"
+        assert all(r._raw is None for r in records), "raw_json decoded eagerly"
+        print("✓ get_matches_from_db returns undecoded MatchRecords")
+
+        by_id = {match['id']: match for match in matches}
+        for record in records[:50]:
+            assert app.generate_prediction(record) == app.generate_prediction(by_id[record.id])
+        print("✓ Predictions from records match predictions from API dicts")
+
+        record = records[0]
+        assert record['homeTeam']['name'] == record.home_team
+        assert record.get('competition')['code'] == record.league_code and record._raw is not None
+        assert app.search_matches(record.home_team)[0].home_team == record.home_team
+        assert app.get_matches_by_ids([record.id])[record.id].utc_date == record.utc_date
+        print("✓ Dict-style access decodes the payload lazily")
+
+    stats = benchmark.memory(lambda: [MatchRecord.from_dict(match) for match in matches])
+    assert stats['retained_kb'] > 0 and stats['peak_kb'] >= stats['retained_kb']
+    print("✓ Benchmark memory probe")
+
+    print("\n✅ Compact Match Records: PASSED")
+    return True
+
+
+def run_all_tests():
+    """Run all performance tests"""
+    tests = [
+        test_metrics_instrumentation,
+        test_benchmark_suite_runs_offline,
+        test_replay_server_and_load_test,
+        test_fast_startup,
+        test_multi_worker_shared_state,
+        test_hedged_data_sources,
+        test_full_text_search,
+        test_team_history_api,
+        test_incremental_standings,
+        test_backtest_engine,
+        test_season_simulation,
+        test_batch_predictions,
+        test_columnar_export,
+        test_compact_match_records,
+    ]
+
+    results = []
+    for test in tests:
+        try:
+            test()
+            results.append((test.__name__, True, None))
+        except AssertionError as e:
+            results.append((test.__name__, False, str(e)))
+            print(f"\n❌ {test.__name__}: FAILED - {e}")
+        except Exception as e:
+            results.append((test.__name__, False, f"Error: {str(e)}"))
+            print(f"\n❌ {test.__name__}: ERROR - {e}")
+
+    print("\n" + "="*80)
+    print("PERFORMANCE SUMMARY")
+    print("="*80)
+    passed = sum(1 for _, success, _ in results if success)
+    for test_name, success, error in results:
+        status = "✅ PASSED" if success else f"❌ FAILED: {error}"
+        print(f"{test_name}: {status}")
+    print(f"\nTOTAL: {passed}/{len(results)} tests passed")
+    return 0 if passed == len(results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(run_all_tests())